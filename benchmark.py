@@ -0,0 +1,288 @@
+"""
+Benchmarks for the game's hot paths.
+
+Times board generation, a worst-case reveal (a board with no mines, so
+one click floods everything), the win check, chording, the solver's
+constraint building and a full frame (draw_frame plus display.flip) for
+the presets and larger boards. Frames
+are drawn headless with SDL's dummy video driver. Boards use fixed seeds,
+so runs are comparable.
+
+    python benchmark.py run [--output results.json] [--sizes hard 1000x1000] [--repeats 10]
+    python benchmark.py compare baseline.json results.json [--threshold 0.1]
+    python benchmark.py idle [--seconds 5]
+
+compare prints the change of every benchmark's best time (the least
+noisy figure on a busy machine) and exits with status 1 if any got slower
+than the threshold allows. idle runs the real game loop on a game in
+progress and the start screen with no input, the old way (the game at a
+fixed FPS, the menu as fast as it can redraw) and event-driven, and
+reports the CPU time each used.
+"""
+
+import argparse
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+# Must be set before pygame is imported by minesweeper
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import numpy as np
+import pygame
+
+import engine
+import minesweeper
+import solver
+
+SEED = 12345
+MINE_DENSITY = 0.15 # Mines per cell on the non-preset sizes
+CHORDS = 1000 # Chords timed per repeat
+WIN_CHECKS = 10000 # Win checks timed per repeat
+SIZES = {
+    **{name: (settings['rows'], settings['cols'], settings['mines'])
+       for name, settings in engine.DIFFICULTIES.items()},
+    '100x100': (100, 100, int(100 * 100 * MINE_DENSITY)),
+    '300x300': (300, 300, int(300 * 300 * MINE_DENSITY)),
+    '1000x1000': (1000, 1000, int(1000 * 1000 * MINE_DENSITY)),
+}
+
+
+# --- Timing ---
+def measure(setup, run, repeats, calls=1):
+    """
+    Times run(setup()) repeats times after one untimed warm-up run,
+    leaving setup out of the timing. calls is how many operations one run
+    performs; results are per call.
+    """
+    run(setup())
+    times = []
+    for _ in range(repeats):
+        state = setup()
+        start = time.perf_counter()
+        run(state)
+        times.append((time.perf_counter() - start) / calls)
+    return {'median': statistics.median(times), 'min': min(times), 'repeats': repeats}
+
+
+# --- Benchmarks ---
+def bench_create_board(game, rows, cols, mines, repeats):
+    return measure(
+        lambda: None,
+        lambda _: engine.create_board(rows, cols, mines, rows // 2, cols // 2, SEED),
+        repeats,
+    )
+
+
+def bench_reveal(game, rows, cols, mines, repeats):
+    """Reveals a whole mine-free board with one click through Game.reveal_cell."""
+    def setup():
+        game.board = engine.create_board(rows, cols, 0, 0, 0, SEED)
+        game.dirty_cells = []
+    return measure(setup, lambda _: game.reveal_cell(0, 0), repeats)
+
+
+def bench_check_win(game, rows, cols, mines, repeats):
+    def setup():
+        game.board = engine.create_board(rows, cols, mines, rows // 2, cols // 2, SEED)
+        game.board.reveal(rows // 2, cols // 2)
+
+    def run(_):
+        for _ in range(WIN_CHECKS):
+            game.check_win_condition()
+    return measure(setup, run, repeats, WIN_CHECKS)
+
+
+def bench_chord(game, rows, cols, mines, repeats):
+    """Chords a fixed sample of numbered cells on a board with every mine flagged."""
+    def setup():
+        board = engine.create_board(rows, cols, mines, rows // 2, cols // 2, SEED)
+        for cell in board.mine_cells.tolist():
+            board.toggle_flag(*divmod(cell, cols))
+        numbered = np.flatnonzero((board.adjacent_mines > 0) & ~board.is_mine).tolist()
+        cells = random.Random(SEED).sample(numbered, min(CHORDS, len(numbered)))
+        cells = [divmod(cell, cols) for cell in cells]
+        for row, col in cells:
+            board.reveal(row, col)
+        return board, cells
+
+    def run(state):
+        board, cells = state
+        for row, col in cells:
+            board.chord(row, col)
+    return measure(setup, run, repeats, CHORDS)
+
+
+def bench_constraints(game, rows, cols, mines, repeats):
+    """Builds the solver's constraints on a board with half the safe cells revealed."""
+    def setup():
+        board = engine.create_board(rows, cols, mines, rows // 2, cols // 2, SEED)
+        half = np.random.default_rng(SEED).random((rows, cols)) < 0.5
+        board.is_revealed |= half & ~board.is_mine
+        return solver.Solver(board, SEED)
+    return measure(setup, lambda player: player.constraints(), repeats)
+
+
+def bench_frame(game, rows, cols, mines, repeats):
+    """Draws a complete frame of a game in progress and flips it to the display."""
+    def setup():
+        game.board = engine.create_board(rows, cols, mines, rows // 2, cols // 2, SEED)
+        game.board.reveal(rows // 2, cols // 2)
+        game.start_time = pygame.time.get_ticks()
+
+    def run(_):
+        game.draw_frame()
+        pygame.display.flip()
+    return measure(setup, run, repeats)
+
+
+BENCHMARKS = {
+    'create_board': bench_create_board,
+    'reveal_cell': bench_reveal,
+    'check_win_condition': bench_check_win,
+    'chord': bench_chord,
+    'constraints': bench_constraints,
+    'frame': bench_frame,
+}
+
+
+def run(sizes, repeats):
+    """Runs every benchmark on every size. Returns the results document."""
+    game = minesweeper.Game()
+    results = {}
+    for size in sizes:
+        rows, cols, mines = SIZES[size]
+        game.setup_window(rows, cols, mines)
+        for name, benchmark in BENCHMARKS.items():
+            result = benchmark(game, rows, cols, mines, repeats)
+            results[f"{name}/{size}"] = result
+            print(f"{name + '/' + size:>32}: {result['min'] * 1000:10.4f} ms best, "
+                  f"{result['median'] * 1000:.4f} ms median")
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pygame': pygame.version.ver,
+        'platform': platform.platform(),
+        'seed': SEED,
+        'results': results,
+    }
+
+
+def idle_cpu(screen, event_driven, seconds):
+    """
+    Leaves the start screen or a hard game in progress (screen is 'menu' or
+    'game') without input for seconds. Returns (CPU seconds the process
+    used meanwhile, passes through the loop).
+    """
+    game = minesweeper.Game()
+    game.event_driven = event_driven
+    game.save_path = os.devnull # The QUIT that ends the run saves the game
+    rows, cols, mines = SIZES['hard']
+    game.setup_window(rows, cols, mines)
+    board = engine.create_board(rows, cols, mines, rows // 2, cols // 2, SEED)
+    board.reveal(rows // 2, cols // 2)
+
+    # Both loops fetch their events once per frame
+    frames = 0
+    next_events = game.next_events
+    def counted_next_events(block):
+        nonlocal frames
+        frames += 1
+        return next_events(block)
+    game.next_events = counted_next_events
+
+    pygame.time.set_timer(pygame.QUIT, int(seconds * 1000), 1)
+    start = time.process_time()
+    try:
+        if screen == 'menu':
+            game.start_screen()
+        else:
+            game.main_game_loop((board, 0))
+    except SystemExit:
+        pass
+    return time.process_time() - start, frames
+
+
+def idle(seconds):
+    """
+    Prints the idle CPU use and frame count of the fixed-rate and
+    event-driven loops. SDL's dummy video driver can't block in
+    event.wait and polls every millisecond instead, so run this with a real
+    display for representative CPU figures.
+    """
+    print(f"{seconds} s idle with the {os.environ['SDL_VIDEODRIVER']} video driver")
+    # Each run quits pygame, so every loop gets a fresh process
+    context = multiprocessing.get_context('spawn')
+    for screen in ('menu', 'game'):
+        results = {}
+        for name, event_driven in (('old loop', False), ('event-driven', True)):
+            with concurrent.futures.ProcessPoolExecutor(1, mp_context=context) as pool:
+                results[name] = pool.submit(idle_cpu, screen, event_driven, seconds).result()
+            cpu, frames = results[name]
+            print(f"{screen + ' ' + name:>18}: {cpu:.3f} s CPU ({cpu / seconds:.1%} of a core), {frames} frames")
+        saved = results['old loop'][0] - results['event-driven'][0]
+        print(f"{screen + ' saved':>18}: {saved:.3f} s CPU ({saved / seconds:.1%} of a core)")
+
+
+def compare(baseline, current, threshold):
+    """Prints the change of each benchmark. Returns the names that regressed."""
+    regressions = []
+    for name, result in current['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            print(f"{name:>32}: {result['min'] * 1000:10.4f} ms (new)")
+            continue
+        change = result['min'] / before['min'] - 1
+        status = ""
+        if change > threshold:
+            status = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:>32}: {before['min'] * 1000:10.4f} -> {result['min'] * 1000:10.4f} ms "
+              f"({change:+.1%}){status}")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Minesweeper hot paths.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="run the benchmarks and save the results")
+    run_parser.add_argument('--output', default='benchmark.json', help="where to write the JSON results")
+    run_parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=list(SIZES),
+                            help="board sizes to benchmark (default: all)")
+    run_parser.add_argument('--repeats', type=int, default=10, help="timed runs per benchmark")
+
+    compare_parser = commands.add_parser('compare', help="compare results against a baseline")
+    compare_parser.add_argument('baseline', help="saved baseline results")
+    compare_parser.add_argument('current', help="new results")
+    compare_parser.add_argument('--threshold', type=float, default=0.1,
+                                help="slowdown that counts as a regression (0.1 = 10%%)")
+
+    idle_parser = commands.add_parser('idle', help="compare the idle CPU use of the game loops")
+    idle_parser.add_argument('--seconds', type=float, default=5, help="how long each loop sits idle")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.command == 'run':
+        document = run(args.sizes, args.repeats)
+        with open(args.output, 'w') as file:
+            json.dump(document, file, indent=2)
+        print(f"Results written to {args.output}")
+    elif args.command == 'idle':
+        idle(args.seconds)
+    else:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        with open(args.current) as file:
+            current = json.load(file)
+        if compare(baseline, current, args.threshold):
+            sys.exit(1)
@@ -0,0 +1,402 @@
+"""
+Headless Minesweeper board engine.
+
+All board state lives in NumPy arrays instead of per-cell objects, so the
+game rules (reveal, flag, chord, win/loss) can run without pygame. The
+pygame front end in minesweeper.py is a thin view over this module.
+"""
+
+import functools
+import hashlib
+import random
+
+import numpy as np
+
+
+# --- Difficulty Presets ---
+DIFFICULTIES = {
+    'easy': {'rows': 9, 'cols': 9, 'mines': 10},
+    'medium': {'rows': 16, 'cols': 16, 'mines': 40},
+    'hard': {'rows': 16, 'cols': 30, 'mines': 99} # Original settings
+}
+
+
+def max_mines(rows, cols):
+    """
+    Returns the most mines a board can hold while any first click stays safe.
+    The safe zone is the clicked cell and its neighbors, at most 3x3 cells.
+    """
+    return rows * cols - min(rows, 3) * min(cols, 3)
+
+
+def validate_config(rows, cols, mines):
+    """Raises ValueError if a board of this size can't hold this many mines."""
+    if rows < 1 or cols < 1:
+        raise ValueError(f"Board must be at least 1x1, got {rows}x{cols}")
+    if not 0 <= mines <= max_mines(rows, cols):
+        raise ValueError(
+            f"A {rows}x{cols} board holds 0 to {max_mines(rows, cols)} mines "
+            f"with a safe first click, got {mines}"
+        )
+
+
+def make_rng(seed=None):
+    """
+    Returns (rng, seed) for mine placement.
+    seed can be an int, a random.Random instance or None for a fresh random
+    seed. The returned seed reproduces the board, or is None if an rng was given.
+    """
+    if isinstance(seed, random.Random):
+        return seed, None
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    return random.Random(seed), seed
+
+
+def count_neighbours(mask):
+    """
+    Counts the True cells around every cell with one 3x3 convolution.
+    Returns a uint8 array the same shape as mask.
+    """
+    rows, cols = mask.shape
+    padded = np.zeros((rows + 2, cols + 2), dtype=np.uint8)
+    padded[1:-1, 1:-1] = mask
+
+    # Sum the 3x3 window around every cell using shifted views of the padding
+    counts = np.zeros((rows, cols), dtype=np.uint8)
+    for dr in (0, 1, 2):
+        for dc in (0, 1, 2):
+            if dr == 1 and dc == 1:
+                continue # Skip the cell itself
+            counts += padded[dr:dr + rows, dc:dc + cols]
+    return counts
+
+
+@functools.lru_cache(maxsize=2)
+def neighbour_table(rows, cols):
+    """
+    Returns a read-only (rows * cols, 8) int32 array of the flat indices
+    around every cell, in row-major order, with -1 where a neighbor would be
+    off the board. It takes 32 bytes per cell, so boards don't build it
+    (they use neighbour_offsets); the solver does, once per board size, to
+    look up many cells at once.
+    """
+    index = np.full((rows + 2, cols + 2), -1, dtype=np.int32)
+    index[1:-1, 1:-1] = np.arange(rows * cols, dtype=np.int32).reshape(rows, cols)
+    table = np.stack([
+        index[dr:dr + rows, dc:dc + cols].ravel()
+        for dr in (0, 1, 2) for dc in (0, 1, 2)
+        if dr != 1 or dc != 1 # Skip the cell itself
+    ], axis=1)
+    table.flags.writeable = False
+    return table
+
+
+@functools.lru_cache(maxsize=16)
+def neighbour_offsets(rows, cols):
+    """
+    Returns the flat index offsets of a cell's neighbors for one board size,
+    as 16 tuples indexed by edge_key. Every cell on an edge or corner shares
+    one of them, so Board.neighbour_cells adds offsets instead of checking
+    bounds. Whatever the board size, the table holds at most 128 ints.
+    """
+    table = []
+    for key in range(16):
+        row_steps = [dr for dr, allowed in ((-1, key & 8), (0, True), (1, key & 4)) if allowed]
+        col_steps = [dc for dc, allowed in ((-1, key & 2), (0, True), (1, key & 1)) if allowed]
+        table.append(tuple(dr * cols + dc for dr in row_steps for dc in col_steps if dr or dc))
+    return tuple(table)
+
+
+def edge_key(row, col, rows, cols):
+    """Returns which sides of (row, col) have neighbors, as an index into neighbour_offsets."""
+    return (row > 0) << 3 | (row < rows - 1) << 2 | (col > 0) << 1 | (col < cols - 1)
+
+
+def count_adjacent_mines(is_mine):
+    """
+    Counts the mines around every cell.
+    Mine cells get 0, matching the old Cell.adjacent_mines default.
+    """
+    counts = count_neighbours(is_mine)
+    counts[is_mine] = 0
+    return counts
+
+
+def label_open_regions(is_open):
+    """
+    Labels the 8-connected regions of open cells without recursion.
+
+    Each row is split into runs of open cells (a scanline view of the
+    board). Runs touching a run in the row above are joined with a
+    vectorized union-find, so no Python code runs per cell and the call
+    stack stays flat however large a region is.
+
+    Returns (labels, bounds): labels holds a region id per cell (-1 for
+    cells that are not open) and bounds[id] is the region's inclusive
+    (top, bottom) row range.
+    """
+    rows, cols = is_open.shape
+
+    # --- 1. Find the runs of open cells in every row ---
+    # A closed column after each row stops runs from wrapping to the next row
+    padded = np.zeros((rows, cols + 1), dtype=bool)
+    padded[:, :cols] = is_open
+    flat = padded.ravel()
+    before = np.empty_like(flat)
+    before[0] = False
+    before[1:] = flat[:-1]
+    after = np.empty_like(flat)
+    after[-1] = False
+    after[:-1] = flat[1:]
+
+    run_starts = np.flatnonzero(flat & ~before)
+    run_ends = np.flatnonzero(flat & ~after)
+    run_row = run_starts // (cols + 1)
+    run_left = run_starts % (cols + 1)
+    run_right = run_ends % (cols + 1)
+    run_count = len(run_starts)
+    if run_count == 0:
+        return np.full((rows, cols), -1, dtype=np.int32), np.empty((0, 2), dtype=np.intp)
+
+    # --- 2. Link every run to the runs it touches in the row above ---
+    # Keys sort runs row by row; the stride leaves room for col - 1 and col + 1
+    stride = cols + 3
+    start_keys = run_row * stride + run_left
+    end_keys = run_row * stride + run_right
+    first = np.searchsorted(end_keys, (run_row - 1) * stride + run_left - 1, 'left')
+    last = np.searchsorted(start_keys, (run_row - 1) * stride + run_right + 1, 'right')
+    links = np.maximum(last - first, 0)
+
+    lower = np.repeat(np.arange(run_count), links)
+    offsets = np.arange(links.sum()) - np.repeat(np.cumsum(links) - links, links)
+    upper = np.repeat(first, links) + offsets
+
+    # --- 3. Union-find: hook roots together, then flatten the trees ---
+    parent = np.arange(run_count)
+    while True:
+        root_upper = parent[upper]
+        root_lower = parent[lower]
+        differ = root_upper != root_lower
+        if not differ.any():
+            break
+
+        root_upper = root_upper[differ]
+        root_lower = root_lower[differ]
+        lowest = np.minimum(root_upper, root_lower)
+        np.minimum.at(parent, root_upper, lowest)
+        np.minimum.at(parent, root_lower, lowest)
+
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+    # --- 4. Spread the region ids back onto the cells ---
+    # The flat board alternates gap, run, gap, run, ... ending in a gap
+    lengths = np.empty(2 * run_count + 1, dtype=np.intp)
+    lengths[0] = run_starts[0]
+    lengths[1:-1:2] = run_ends - run_starts + 1
+    lengths[2:-1:2] = run_starts[1:] - run_ends[:-1] - 1
+    lengths[-1] = flat.size - run_ends[-1] - 1
+    values = np.full(2 * run_count + 1, -1, dtype=np.int32)
+    values[1::2] = parent
+    labels = np.repeat(values, lengths).reshape(rows, cols + 1)[:, :cols]
+
+    bounds = np.empty((run_count, 2), dtype=np.intp)
+    bounds[:, 0] = rows
+    bounds[:, 1] = -1
+    np.minimum.at(bounds[:, 0], parent, run_row)
+    np.maximum.at(bounds[:, 1], parent, run_row)
+    return labels, bounds
+
+
+class Board:
+    """Holds all data for one game board in contiguous NumPy arrays."""
+    def __init__(self, rows, cols, mines):
+        validate_config(rows, cols, mines)
+        self.rows = rows
+        self.cols = cols
+        self.mines = mines
+        self.seed = None # Seed the mines were placed with, for reproducing the board
+        self.safe_cell = None # (row, col) the mines were placed around
+
+        # One entry per cell, indexed [row, col]
+        self.is_mine = np.zeros((rows, cols), dtype=bool)
+        self.adjacent_mines = np.zeros((rows, cols), dtype=np.uint8)
+        self.is_revealed = np.zeros((rows, cols), dtype=bool)
+        self.is_flagged = np.zeros((rows, cols), dtype=bool)
+
+        self.flags_placed = 0
+        self.exploded = False # Set when a mine is revealed
+
+        # Kept up to date by reveal so win checks never scan the board
+        self.safe_cells_left = rows * cols - mines
+        self.mine_cells = np.empty(0, dtype=np.intp) # Flat indices of the mines
+        self._neighbour_offsets = neighbour_offsets(rows, cols) # Shared by every board of this size
+
+        # Region labels of the 0 cells, built on the first flood fill
+        self._open_labels = None
+        self._open_bounds = None
+
+    @property
+    def nbytes(self):
+        """Bytes held by the board's arrays, including the cached fill labels."""
+        arrays = [self.is_mine, self.adjacent_mines, self.is_revealed, self.is_flagged, self.mine_cells]
+        if self._open_labels is not None:
+            arrays += [self._open_labels, self._open_bounds]
+        return sum(array.nbytes for array in arrays)
+
+    def neighbour_cells(self, row, col):
+        """Returns a list of the flat indices of the cells around the given cell."""
+        cell = row * self.cols + col
+        offsets = self._neighbour_offsets[edge_key(row, col, self.rows, self.cols)]
+        return [cell + offset for offset in offsets]
+
+    def place_mines(self, safe_row, safe_col, seed=None):
+        """
+        Places the mines after the first click, avoiding the clicked cell
+        and its neighbors, then calculates the adjacent mine counts.
+        Mines are sampled directly from the allowed cells in one pass, so
+        placement takes bounded time at any density. seed can be an int or
+        a random.Random instance (see make_rng).
+        """
+        rng, self.seed = make_rng(seed)
+        self.safe_cell = (safe_row, safe_col)
+
+        # --- 1. Mark the "unsafe" cells ---
+        # This includes the clicked cell and its 8 neighbors
+        unsafe = np.zeros((self.rows, self.cols), dtype=bool)
+        unsafe[max(safe_row - 1, 0):safe_row + 2, max(safe_col - 1, 0):safe_col + 2] = True
+
+        # --- 2. Place Mines ---
+        # Pick exactly self.mines distinct cells from the allowed ones.
+        # NumPy does the sampling, seeded from rng so boards stay reproducible.
+        allowed = np.flatnonzero(~unsafe)
+        generator = np.random.default_rng(rng.getrandbits(64))
+        picks = generator.choice(len(allowed), self.mines, replace=False)
+        self.is_mine.flat[allowed[picks]] = True
+
+        # --- 3. Calculate Adjacent Mines ---
+        self.adjacent_mines = count_adjacent_mines(self.is_mine)
+        self.mine_cells = np.flatnonzero(self.is_mine)
+        self._open_labels = None
+
+    def reveal(self, row, col):
+        """
+        Reveals a cell, flood filling from 0s without recursion.
+        Returns a NumPy array of the flat indices (row * cols + col) of
+        the cells that were newly revealed.
+        """
+        # --- Cells that can't be revealed ---
+        if self.is_flagged[row, col] or self.is_revealed[row, col]:
+            return np.empty(0, dtype=np.intp)
+
+        # --- Mines and numbers only reveal themselves ---
+        if self.is_mine[row, col] or self.adjacent_mines[row, col] > 0:
+            self.is_revealed[row, col] = True
+            if self.is_mine[row, col]:
+                self.exploded = True # Hit a mine! Game over.
+            else:
+                self.safe_cells_left -= 1
+            return np.array([row * self.cols + col], dtype=np.intp)
+
+        # --- Flood fill the 0 region and its numbered border ---
+        if self._open_labels is None:
+            is_open = (self.adjacent_mines == 0) & ~self.is_mine & ~self.is_flagged
+            self._open_labels, self._open_bounds = label_open_regions(is_open)
+
+        label = self._open_labels[row, col]
+        top, bottom = self._open_bounds[label][:2]
+
+        # Work on the band of rows the region covers, grown by one row
+        top, bottom = max(top - 1, 0), min(bottom + 2, self.rows)
+        region = self._open_labels[top:bottom] == label
+
+        # Every neighbor of a 0 gets revealed, so grow the region by one cell
+        grown = region.copy()
+        grown[1:] |= region[:-1]
+        grown[:-1] |= region[1:]
+        border = grown.copy()
+        border[:, 1:] |= grown[:, :-1]
+        border[:, :-1] |= grown[:, 1:]
+
+        revealed = self.is_revealed[top:bottom]
+        new_cells = border & ~revealed & ~self.is_flagged[top:bottom]
+        revealed |= new_cells
+
+        # A 0 region and its border never contain a mine
+        new_indices = np.flatnonzero(new_cells) + top * self.cols
+        self.safe_cells_left -= len(new_indices)
+        return new_indices
+
+    def toggle_flag(self, row, col):
+        """
+        Places or removes a flag on a hidden cell.
+        Returns True if the flag state changed.
+        """
+        if self.is_revealed[row, col]:
+            return False
+
+        if self.is_flagged[row, col]:
+            self.is_flagged[row, col] = False
+            self.flags_placed -= 1
+        else:
+            self.is_flagged[row, col] = True
+            self.flags_placed += 1
+
+        # Flags on 0 cells split the flood fill regions
+        if not self.is_mine[row, col] and self.adjacent_mines[row, col] == 0:
+            self._open_labels = None
+        return True
+
+    def chord(self, row, col):
+        """
+        Reveals all unflagged neighbors of a revealed number once the
+        right number of flags has been placed around it.
+        Returns the flat indices of the cells that were newly revealed.
+        """
+        if not self.is_revealed[row, col] or self.adjacent_mines[row, col] == 0:
+            return np.empty(0, dtype=np.intp)
+
+        # Count flagged neighbors
+        neighbours = self.neighbour_cells(row, col)
+        is_flagged = self.is_flagged.ravel()
+        is_revealed = self.is_revealed.ravel()
+        flagged_neighbors = 0
+        for cell in neighbours:
+            if is_flagged[cell]:
+                flagged_neighbors += 1
+
+        # If we've flagged exactly the right number of neighbors
+        revealed = []
+        if flagged_neighbors == self.adjacent_mines[row, col]:
+            for cell in neighbours:
+                if not is_flagged[cell] and not is_revealed[cell]:
+                    revealed.append(self.reveal(*divmod(cell, self.cols)))
+
+        if not revealed:
+            return np.empty(0, dtype=np.intp)
+        return np.concatenate(revealed)
+
+    def reveal_mines(self):
+        """Reveals every mine after the game is lost, touching only the mines."""
+        self.is_revealed.flat[self.mine_cells] = True
+
+    def digest(self):
+        """Returns a short hash of what the player sees: revealed cells, flags and explosion."""
+        state = hashlib.sha1(np.packbits(self.is_revealed).tobytes())
+        state.update(np.packbits(self.is_flagged).tobytes())
+        state.update(bytes([self.exploded]))
+        return state.hexdigest()[:16]
+
+    def check_win(self):
+        """Checks if every non-mine cell has been revealed."""
+        return not self.exploded and self.safe_cells_left == 0
+
+def create_board(rows, cols, mines, safe_row, safe_col, seed=None):
+    """Creates a board whose mines avoid the first clicked cell and its neighbors."""
+    board = Board(rows, cols, mines)
+    board.place_mines(safe_row, safe_col, seed)
+    return board
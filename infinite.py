@@ -0,0 +1,279 @@
+"""
+Endless boards for the infinite mode.
+
+The world is split into CHUNK_SIZE x CHUNK_SIZE chunks. A chunk's mines
+come from a hash of the world seed and the chunk's coordinates, so any
+chunk can be rebuilt exactly at any time. Chunks are only built when a
+flood fill or the camera reaches them. Their adjacent counts include the
+mines on the edges of the neighboring chunks, which are generated on
+demand as well.
+
+Chunks that were never revealed or flagged in are evicted, least
+recently used first, once the loaded chunks use more than the memory
+budget; they are simply regenerated if the camera comes back.
+
+InfiniteBoard has the same reveal / toggle_flag / chord interface as
+engine.Board, with row and col allowed to be any integers. Its
+is_mine, adjacent_mines, is_revealed and is_flagged can be indexed like
+the Board arrays with a (row, col) pair, a pair of slices or a pair of
+index arrays, so the game draws both boards the same way.
+"""
+
+import hashlib
+import struct
+from collections import OrderedDict
+
+import numpy as np
+
+import engine
+
+CHUNK_SIZE = 32
+MINE_DENSITY = 0.16 # Chance of a mine on each cell
+MIN_DENSITY = 0.12 # Sparser worlds could have endless 0 regions for a flood fill to follow
+MEMORY_BUDGET = 32 * 1024 * 1024 # Bytes of chunk arrays kept before untouched chunks are evicted
+MINE_CACHE_SIZE = 256 # Mine layouts of unloaded chunks kept for their neighbors' counts
+# (d_row, d_col) of the 8 neighbors; the world has no edges, so no bounds checks
+NEIGHBOUR_OFFSETS = tuple((dr, dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1) if dr != 0 or dc != 0)
+
+
+class Chunk:
+    """The state of one chunk. Arrays are indexed [row, col] inside the chunk."""
+    def __init__(self, is_mine, adjacent_mines):
+        self.is_mine = is_mine
+        self.adjacent_mines = adjacent_mines
+        self.is_revealed = np.zeros(is_mine.shape, dtype=bool)
+        self.is_flagged = np.zeros(is_mine.shape, dtype=bool)
+        self.touched = False # Revealed or flagged in, so it can't be regenerated
+
+    @property
+    def nbytes(self):
+        return self.is_mine.nbytes + self.adjacent_mines.nbytes + self.is_revealed.nbytes + self.is_flagged.nbytes
+
+
+class Layer:
+    """Indexes one per-cell array (e.g. is_mine) across all chunks with world coordinates."""
+    def __init__(self, board, name):
+        self.board = board
+        self.name = name
+
+    def __getitem__(self, key):
+        rows, cols = key
+        board = self.board
+        if isinstance(rows, slice):
+            return board.window(self.name, rows.start, rows.stop, cols.start, cols.stop)
+        if isinstance(rows, (np.ndarray, list)):
+            cells = zip(np.asarray(rows).tolist(), np.asarray(cols).tolist())
+            dtype = np.uint8 if self.name == 'adjacent_mines' else bool
+            return np.array([board.cell(self.name, row, col) for row, col in cells], dtype=dtype)
+        return board.cell(self.name, rows, cols)
+
+
+class InfiniteBoard:
+    """An endless board built chunk by chunk from a world seed."""
+    def __init__(self, seed=None, safe_cell=(0, 0), density=MINE_DENSITY,
+                 chunk_size=CHUNK_SIZE, memory_budget=MEMORY_BUDGET):
+        if not MIN_DENSITY <= density < 1:
+            raise ValueError(f"Mine density must be between {MIN_DENSITY} and 1, got {density}")
+        rng, self.seed = engine.make_rng(seed)
+        if self.seed is None:
+            self.seed = rng.getrandbits(64)
+        self.safe_cell = safe_cell # Its 3x3 block never has mines, so the first click is safe
+        self.density = density
+        self.chunk_size = chunk_size
+        self.memory_budget = memory_budget
+
+        self.chunks = OrderedDict() # (chunk row, chunk col) -> Chunk, least recently used first
+        self.mine_cache = OrderedDict() # (chunk row, chunk col) -> is_mine of chunks not loaded
+        self.nbytes = 0 # Bytes used by the loaded chunks
+
+        self.flags_placed = 0
+        self.exploded = False
+        self.mines_shown = False # Set by reveal_mines after a loss
+        self.cells_revealed = 0
+
+        self.is_mine = Layer(self, 'is_mine')
+        self.adjacent_mines = Layer(self, 'adjacent_mines')
+        self.is_revealed = Layer(self, 'is_revealed')
+        self.is_flagged = Layer(self, 'is_flagged')
+
+    # --- Chunks ---
+    def chunk_mines(self, chunk_row, chunk_col):
+        """Generates the mine layout of a chunk from the world seed alone."""
+        key = struct.pack('<Qqq', self.seed % 2 ** 64, chunk_row, chunk_col)
+        chunk_seed = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little')
+        size = self.chunk_size
+        is_mine = np.random.default_rng(chunk_seed).random((size, size)) < self.density
+
+        # Keep the first click's 3x3 block free of mines
+        safe_row, safe_col = self.safe_cell
+        top, left = chunk_row * size, chunk_col * size
+        row_start, row_end = max(safe_row - 1 - top, 0), min(safe_row + 2 - top, size)
+        col_start, col_end = max(safe_col - 1 - left, 0), min(safe_col + 2 - left, size)
+        if row_start < row_end and col_start < col_end:
+            is_mine[row_start:row_end, col_start:col_end] = False
+        return is_mine
+
+    def mines_of(self, chunk_row, chunk_col):
+        """Returns a chunk's mines, from the loaded chunk, the cache or a fresh generation."""
+        key = (chunk_row, chunk_col)
+        chunk = self.chunks.get(key)
+        if chunk is not None:
+            return chunk.is_mine
+        is_mine = self.mine_cache.get(key)
+        if is_mine is None:
+            is_mine = self.chunk_mines(chunk_row, chunk_col)
+            self.mine_cache[key] = is_mine
+            if len(self.mine_cache) > MINE_CACHE_SIZE:
+                self.mine_cache.popitem(last=False)
+        else:
+            self.mine_cache.move_to_end(key)
+        return is_mine
+
+    def chunk(self, chunk_row, chunk_col):
+        """Returns a loaded chunk, building it first if needed."""
+        key = (chunk_row, chunk_col)
+        chunk = self.chunks.get(key)
+        if chunk is not None:
+            self.chunks.move_to_end(key)
+            return chunk
+
+        # Count mines over the chunk plus a one-cell border taken from its neighbors
+        size = self.chunk_size
+        padded = np.zeros((size + 2, size + 2), dtype=bool)
+        for d_row in (-1, 0, 1):
+            for d_col in (-1, 0, 1):
+                mines = self.mines_of(chunk_row + d_row, chunk_col + d_col)
+                rows = slice(0, 1) if d_row < 0 else slice(size + 1, size + 2) if d_row > 0 else slice(1, size + 1)
+                cols = slice(0, 1) if d_col < 0 else slice(size + 1, size + 2) if d_col > 0 else slice(1, size + 1)
+                source_rows = slice(size - 1, size) if d_row < 0 else slice(0, 1) if d_row > 0 else slice(None)
+                source_cols = slice(size - 1, size) if d_col < 0 else slice(0, 1) if d_col > 0 else slice(None)
+                padded[rows, cols] = mines[source_rows, source_cols]
+        is_mine = padded[1:-1, 1:-1].copy()
+        adjacent_mines = engine.count_neighbours(padded)[1:-1, 1:-1].copy()
+        adjacent_mines[is_mine] = 0 # Mines don't show a number
+
+        self.mine_cache.pop(key, None)
+        chunk = Chunk(is_mine, adjacent_mines)
+        self.chunks[key] = chunk
+        self.nbytes += chunk.nbytes
+        self.evict(keep=key)
+        return chunk
+
+    def evict(self, keep=None):
+        """
+        Drops untouched chunks, least recently used first, until the loaded
+        chunks fit the budget. The chunk keep is never dropped.
+        """
+        if self.nbytes <= self.memory_budget:
+            return
+        for key in list(self.chunks):
+            chunk = self.chunks[key]
+            if not chunk.touched and key != keep:
+                del self.chunks[key]
+                self.nbytes -= chunk.nbytes
+                if self.nbytes <= self.memory_budget:
+                    return
+
+    def locate(self, row, col):
+        """Returns (chunk, row, col inside the chunk) for a world cell."""
+        chunk_row, local_row = divmod(row, self.chunk_size)
+        chunk_col, local_col = divmod(col, self.chunk_size)
+        return self.chunk(chunk_row, chunk_col), local_row, local_col
+
+    # --- Reading cells ---
+    def cell(self, name, row, col):
+        chunk, local_row, local_col = self.locate(row, col)
+        value = getattr(chunk, name)[local_row, local_col]
+        if name == 'is_revealed' and self.mines_shown:
+            value = value or chunk.is_mine[local_row, local_col]
+        return value
+
+    def window(self, name, first_row, end_row, first_col, end_col):
+        """Returns one array over a block of world cells (ends exclusive), building chunks as needed."""
+        size = self.chunk_size
+        dtype = np.uint8 if name == 'adjacent_mines' else bool
+        result = np.zeros((end_row - first_row, end_col - first_col), dtype=dtype)
+
+        for chunk_row in range(first_row // size, (end_row - 1) // size + 1):
+            top = chunk_row * size
+            row_start, row_end = max(first_row, top), min(end_row, top + size)
+            for chunk_col in range(first_col // size, (end_col - 1) // size + 1):
+                left = chunk_col * size
+                col_start, col_end = max(first_col, left), min(end_col, left + size)
+                chunk = self.chunk(chunk_row, chunk_col)
+                block = getattr(chunk, name)[row_start - top:row_end - top, col_start - left:col_end - left]
+                if name == 'is_revealed' and self.mines_shown:
+                    block = block | chunk.is_mine[row_start - top:row_end - top, col_start - left:col_end - left]
+                result[row_start - first_row:row_end - first_row, col_start - first_col:col_end - first_col] = block
+        return result
+
+    def neighbours(self, row, col):
+        """Returns the coordinates of the 8 cells around (row, col)."""
+        return [(row + dr, col + dc) for dr, dc in NEIGHBOUR_OFFSETS]
+
+    # --- Game rules ---
+    def reveal(self, row, col):
+        """
+        Reveals a cell and flood fills from 0s, loading chunks as the fill
+        reaches them. Returns an (n, 2) array of the (row, col) revealed.
+        """
+        chunk, local_row, local_col = self.locate(row, col)
+        if chunk.is_revealed[local_row, local_col] or chunk.is_flagged[local_row, local_col]:
+            return np.empty((0, 2), dtype=np.int64)
+
+        chunk.touched = True
+        chunk.is_revealed[local_row, local_col] = True
+        if chunk.is_mine[local_row, local_col]:
+            self.exploded = True
+            return np.array([[row, col]], dtype=np.int64)
+
+        revealed = [(row, col)]
+        stack = [(row, col)] if chunk.adjacent_mines[local_row, local_col] == 0 else []
+        while stack:
+            cell_row, cell_col = stack.pop()
+            for nr, nc in self.neighbours(cell_row, cell_col):
+                chunk, local_row, local_col = self.locate(nr, nc)
+                if chunk.is_revealed[local_row, local_col] or chunk.is_flagged[local_row, local_col]:
+                    continue
+                chunk.touched = True
+                chunk.is_revealed[local_row, local_col] = True
+                revealed.append((nr, nc))
+                if chunk.adjacent_mines[local_row, local_col] == 0:
+                    stack.append((nr, nc))
+
+        self.cells_revealed += len(revealed)
+        return np.array(revealed, dtype=np.int64)
+
+    def toggle_flag(self, row, col):
+        """Flags or unflags a hidden cell. Returns True if the cell changed."""
+        chunk, local_row, local_col = self.locate(row, col)
+        if chunk.is_revealed[local_row, local_col]:
+            return False
+        chunk.touched = True
+        chunk.is_flagged[local_row, local_col] = not chunk.is_flagged[local_row, local_col]
+        self.flags_placed += 1 if chunk.is_flagged[local_row, local_col] else -1
+        return True
+
+    def chord(self, row, col):
+        """
+        Reveals all unflagged neighbors of a revealed number once the right
+        number of flags has been placed around it. Returns the cells revealed.
+        """
+        chunk, local_row, local_col = self.locate(row, col)
+        count = chunk.adjacent_mines[local_row, local_col]
+        if not chunk.is_revealed[local_row, local_col] or count == 0:
+            return np.empty((0, 2), dtype=np.int64)
+
+        neighbours = self.neighbours(row, col)
+        if sum(1 for nr, nc in neighbours if self.cell('is_flagged', nr, nc)) != count:
+            return np.empty((0, 2), dtype=np.int64)
+        revealed = [self.reveal(nr, nc) for nr, nc in neighbours]
+        return np.concatenate(revealed)
+
+    def reveal_mines(self):
+        """Shows every mine, including those of chunks loaded later."""
+        self.mines_shown = True
+
+    def check_win(self):
+        """An endless board can't be won."""
+        return False
@@ -0,0 +1,108 @@
+"""
+Load test for server.py.
+
+Opens many concurrent connections, each playing games as a simple bot:
+it reveals random hidden cells it hasn't ruled out, and starts a new
+game when one ends. Every request's round trip is timed, and the run
+reports latency percentiles and the requests per second the server
+sustained across all connections.
+
+    python server.py &
+    python loadtest.py [--sessions 1000] [--requests 50] [--difficulty hard]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+import engine
+import server
+
+
+class Bot:
+    """One connection playing games back to back."""
+    def __init__(self, reader, writer, difficulty, rng):
+        self.reader = reader
+        self.writer = writer
+        self.difficulty = difficulty
+        self.rng = rng
+        self.latencies = []
+        self.errors = 0
+        self.hidden = [] # Cells of the current game not known to be revealed or flagged
+        self.game = None
+
+    async def request(self, message):
+        start = time.perf_counter()
+        self.writer.write((json.dumps(message) + "\n").encode())
+        await self.writer.drain()
+        response = json.loads(await self.reader.readline())
+        self.latencies.append(time.perf_counter() - start)
+        if not response.get('ok'):
+            self.errors += 1
+        return response
+
+    async def new_game(self):
+        response = await self.request({'op': 'new', 'difficulty': self.difficulty, 'seed': self.rng.getrandbits(32)})
+        self.game = response['game']
+        self.hidden = [(row, col) for row in range(response['rows']) for col in range(response['cols'])]
+        self.rng.shuffle(self.hidden)
+
+    async def play(self, requests):
+        await self.new_game()
+        for _ in range(requests - 1):
+            if not self.hidden:
+                await self.new_game()
+                continue
+            row, col = self.hidden.pop()
+            response = await self.request({'op': 'reveal', 'game': self.game, 'row': row, 'col': col})
+            if response.get('state', 'playing') != 'playing':
+                await self.request({'op': 'close', 'game': self.game})
+                self.hidden = []
+            elif response.get('cells'):
+                opened = {(row, col) for row, col, _ in response['cells']}
+                self.hidden = [cell for cell in self.hidden if cell not in opened]
+        self.writer.close()
+
+
+async def connect(args):
+    if args.unix:
+        return await asyncio.open_unix_connection(args.unix, limit=server.MAX_LINE * 16)
+    return await asyncio.open_connection(args.host, args.port, limit=server.MAX_LINE * 16)
+
+
+async def run(args):
+    """Runs the load test and prints its report."""
+    rng = random.Random(args.seed)
+    streams = await asyncio.gather(*(connect(args) for _ in range(args.sessions)))
+    bots = [Bot(reader, writer, args.difficulty, random.Random(rng.getrandbits(32))) for reader, writer in streams]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(bot.play(args.requests) for bot in bots))
+    seconds = time.perf_counter() - start
+
+    latencies = sorted(latency for bot in bots for latency in bot.latencies)
+    errors = sum(bot.errors for bot in bots)
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(f"{args.sessions} sessions, {len(latencies)} requests in {seconds:.2f} s, {errors} errors")
+    print(f"{len(latencies) / seconds:.0f} requests/s")
+    print(f"latency p50 {percentiles[49] * 1000:.2f} ms, p99 {percentiles[98] * 1000:.2f} ms, "
+          f"max {latencies[-1] * 1000:.2f} ms")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the Minesweeper server.")
+    parser.add_argument('--host', default=server.DEFAULT_HOST, help="server TCP address")
+    parser.add_argument('--port', type=int, default=server.DEFAULT_PORT, help="server TCP port")
+    parser.add_argument('--unix', metavar='PATH', help="connect to a Unix socket instead of TCP")
+    parser.add_argument('--sessions', type=int, default=1000, help="concurrent connections")
+    parser.add_argument('--requests', type=int, default=50, help="requests sent per connection")
+    parser.add_argument('--difficulty', choices=list(engine.DIFFICULTIES), default='hard')
+    parser.add_argument('--seed', type=int, default=0, help="seed for the bots' boards and moves")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
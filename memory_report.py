@@ -0,0 +1,80 @@
+"""
+Memory report for large boards.
+
+Compares the old layout (one Python Cell object with its own pygame.Rect per
+cell) with the NumPy arrays used by engine.Board. Run it with:
+
+    python memory_report.py [rows] [cols] [mines]
+
+Defaults to a 1000x1000 board with 150000 mines.
+"""
+
+import sys
+import time
+import tracemalloc
+
+import pygame
+
+import engine
+
+CELL_SIZE = 30
+
+
+# --- Old Layout (for comparison only) ---
+class LegacyCell:
+    """The per-cell object the game used before the board engine."""
+    def __init__(self, row, col):
+        self.row = row
+        self.col = col
+        self.rect = pygame.Rect(col * CELL_SIZE, row * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+
+        self.is_mine = False
+        self.adjacent_mines = 0
+        self.is_revealed = False
+        self.is_flagged = False
+
+
+def measure(build):
+    """Runs build() and returns (result, bytes still held, peak bytes, seconds taken)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    seconds = time.perf_counter() - start
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, held, peak, seconds
+
+
+def build_legacy(rows, cols):
+    """Builds the old 2D list of Cell objects (mines left out, they add no objects)."""
+    return [[LegacyCell(row, col) for col in range(cols)] for row in range(rows)]
+
+
+def build_engine(rows, cols, mines):
+    """Builds an engine board and opens it with one flood fill from the safe corner."""
+    board = engine.create_board(rows, cols, mines, 0, 0, seed=0)
+    board.reveal(0, 0)
+    return board
+
+
+def report(rows, cols, mines):
+    """Prints the before/after memory use and build time."""
+    cells = rows * cols
+    print(f"Board: {rows}x{cols}, {mines} mines ({cells} cells)")
+
+    _, legacy_held, legacy_peak, legacy_seconds = measure(lambda: build_legacy(rows, cols))
+    print(f"  Cell objects : {legacy_held / 2**20:8.1f} MB held ({legacy_held / cells:5.1f} bytes/cell), "
+          f"{legacy_peak / 2**20:8.1f} MB peak, built in {legacy_seconds:.2f}s")
+
+    board, engine_held, engine_peak, engine_seconds = measure(lambda: build_engine(rows, cols, mines))
+    print(f"  NumPy engine : {engine_held / 2**20:8.1f} MB held ({engine_held / cells:5.1f} bytes/cell), "
+          f"{engine_peak / 2**20:8.1f} MB peak, built and flood filled in {engine_seconds:.2f}s")
+    print(f"                 ({board.nbytes / 2**20:.1f} MB of that is the board's own arrays)")
+    table_bytes = cells * 8 * 4 # engine.neighbour_table, int32
+    print(f"  Solver       : {table_bytes / 2**20:8.1f} MB more for the neighbour table, built only when the solver runs")
+    print(f"  Saving       : {legacy_held / engine_held:.1f}x less memory held")
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:4]]
+    rows, cols, mines = args + [1000, 1000, 150000][len(args):]
+    report(rows, cols, mines)
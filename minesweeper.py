@@ -1,90 +1,179 @@
 #I acknowledge the use of Gemini Flash 2.5 for the making of this game.
 
+import argparse
+import collections
+import cProfile
+import json
+import os
+import pstats
 import pygame
 import sys
-import random
+import threading
+import time
 
-# --- Pygame Initialization ---
-pygame.init()
-pygame.mixer.init()
+import numpy as np
+
+import engine
+import infinite
+import noguess
+import savegame
 
 # --- Sound Effects ---
 # Note: Sound files are optional - game will work without them
-# To add sounds, place these audio files in the same directory as this script:
+# Sounds are loaded from the files/sounds folder next to this script:
 # - click.ogg or click.wav (short click sound for revealing numbered cells)
 # - explosion.ogg or explosion.wav (explosion sound when hitting a mine)
 # - flag.ogg or flag.wav (flag placement/removal sound)
 # - win.ogg or win.wav (victory sound)
 # You can download free sounds from: freesound.org, zapsplat.com, or similar
-try:
-    sound_files = {
-        'click': ['E:/Keele_sem_1/software_programming/assessment_02/files/sounds/click.ogg', 'click.wav'],
-        'explosion': ['E:/Keele_sem_1/software_programming/assessment_02/files/sounds/explosion.ogg', 'explosion.wav'],
-        'flag': ['E:/Keele_sem_1/software_programming/assessment_02/files/sounds/flag.ogg', 'flag.wav'],
-        'win': ['E:/Keele_sem_1/software_programming/assessment_02/files/sounds/win.ogg', 'win.wav']
-    }
-    
-    def load_sound(sound_names):
-        """Try to load sound from multiple file formats"""
-        for sound_file in sound_names:
-            try:
-                return pygame.mixer.Sound(sound_file)
-            except (pygame.error, FileNotFoundError):
-                continue
-        return None
-    
-    click_sound = load_sound(sound_files['click'])
-    explosion_sound = load_sound(sound_files['explosion'])
-    flag_sound = load_sound(sound_files['flag'])
-    win_sound = load_sound(sound_files['win'])
+SOUND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'files', 'sounds')
+
+SOUND_NAMES = ('click', 'explosion', 'flag', 'win')
+
+# Set by load_sounds() once init() has started the mixer; importing this module touches no files
+sounds = {} # Sound name -> pygame.mixer.Sound, for the sounds that were found
+sounds_enabled = False
+
+def load_sound(name):
+    """Try to load sound from multiple file formats"""
+    for extension in ('.ogg', '.wav'):
+        try:
+            return pygame.mixer.Sound(os.path.join(SOUND_DIR, name + extension))
+        except (pygame.error, FileNotFoundError):
+            continue
+    return None
+
+def load_sounds():
+    """Loads the sound effects. init() runs this on a background thread."""
+    global sounds, sounds_enabled
+    loaded = {}
+    for name in SOUND_NAMES:
+        sound = load_sound(name)
+        if sound is not None:
+            loaded[name] = sound
+    sounds = loaded # Swapped in whole, so the game thread never sees it half built
     
     # Check if any sounds were loaded
-    loaded_sounds = sum(1 for sound in [click_sound, explosion_sound, flag_sound, win_sound] if sound is not None)
-    
-    if loaded_sounds > 0:
+    if loaded:
         sounds_enabled = True
-        print(f"Sound effects loaded successfully! ({loaded_sounds}/4 sounds found)")
-        if click_sound is None: print("  - click sound not found")
-        if explosion_sound is None: print("  - explosion sound not found")
-        if flag_sound is None: print("  - flag sound not found")
-        if win_sound is None: print("  - win sound not found")
+        print(f"Sound effects loaded successfully! ({len(loaded)}/{len(SOUND_NAMES)} sounds found)")
+        for name in SOUND_NAMES:
+            if name not in loaded: print(f"  - {name} sound not found")
     else:
-        sounds_enabled = False
-        print("No sound files found - game will run without sound effects")
+        print(f"No sound files found in {SOUND_DIR} - game will run without sound effects")
         print("Supported formats: .ogg, .wav")
-        
-except pygame.error as e:
-    # If sound system fails to initialize
-    click_sound = None
-    explosion_sound = None
-    flag_sound = None
-    win_sound = None
-    sounds_enabled = False
-    print(f"Sound system error: {e} - game will run without sound effects")
-
-def play_sound(sound):
-    """Helper function to safely play sounds"""
-    if sounds_enabled and sound is not None:
-        try:
-            sound.play()
-        except pygame.error:
-            pass  # Ignore sound errors
+
+# --- Audio Bus ---
+SOUND_CHANNELS = 4 # Mixer channels reserved for the sound effects
+# A sound may take a channel from a lower priority one, so a burst of clicks
+# can't keep the explosion or the win from playing
+SOUND_PRIORITIES = {'click': 0, 'flag': 1, 'explosion': 2, 'win': 3}
+
+class AudioBus:
+    """
+    Collects the sounds requested during a frame and plays them once per
+    frame on a fixed pool of reserved mixer channels. Requests are
+    de-duplicated, so a flood fill that opens hundreds of numbers plays one
+    click, and a frame costs at most one play per sound name.
+    """
+    def __init__(self):
+        self.pending = set() # Sound names requested since the last flush
+        self.channels = [] # Reserved mixer channels, set up by setup()
+        self.priorities = [] # Priority of the sound last started on each channel
+
+    def setup(self):
+        """Reserves the channels. init() calls this once the mixer is running."""
+        pygame.mixer.set_reserved(SOUND_CHANNELS) # Sound.play() never picks these
+        self.channels = [pygame.mixer.Channel(index) for index in range(SOUND_CHANNELS)]
+        self.priorities = [0] * SOUND_CHANNELS
+
+    def queue(self, name):
+        """Requests a sound for this frame; asking again in the same frame does nothing."""
+        self.pending.add(name)
+
+    def flush(self):
+        """Plays this frame's sounds, highest priority first. Called once per frame."""
+        if not self.pending:
+            return
+        names = sorted(self.pending, key=SOUND_PRIORITIES.get, reverse=True)
+        self.pending.clear()
+        if not sounds_enabled or not self.channels:
+            return
+
+        for name in names:
+            sound = sounds.get(name)
+            if sound is None:
+                continue
+            index = self.free_channel(SOUND_PRIORITIES[name])
+            if index is None:
+                continue # Every channel holds something at least as important
+            try:
+                self.channels[index].play(sound)
+            except pygame.error:
+                continue # Ignore sound errors
+            self.priorities[index] = SOUND_PRIORITIES[name]
+
+    def free_channel(self, priority):
+        """Returns an idle channel, else the one playing the least important sound below priority."""
+        lowest = None
+        for index, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                return index
+            if self.priorities[index] < priority and (lowest is None or self.priorities[index] < self.priorities[lowest]):
+                lowest = index
+        return lowest
+
+audio = AudioBus()
 
 # --- Game Configuration ---
 # We no longer set ROWS, COLS, MINES here.
 # Instead, we define difficulty settings.
-DIFFICULTIES = {
-    'easy': {'rows': 9, 'cols': 9, 'mines': 10},
-    'medium': {'rows': 16, 'cols': 16, 'mines': 40},
-    'hard': {'rows': 16, 'cols': 30, 'mines': 99} # Original settings
-}
+DIFFICULTIES = engine.DIFFICULTIES # Shared with the headless tools
+MAX_CELLS = 5000 * 5000 # Largest custom board; bigger ones can exhaust memory on the first click
+
+def validate_board_size(rows, cols, mines):
+    """Raises ValueError for a board the game can't hold or play."""
+    engine.validate_config(rows, cols, mines)
+    if rows * cols > MAX_CELLS:
+        raise ValueError(f"Board is too big: {rows}x{cols} is over the {MAX_CELLS} cell limit")
 
 CELL_SIZE = 30
+UI_BAR_HEIGHT = 50
 # SCREEN_WIDTH and SCREEN_HEIGHT are now dynamic
 
+# --- Viewport ---
+# Boards bigger than this are shown through a scrollable, zoomable camera
+MAX_VIEW_WIDTH = 1200
+MAX_VIEW_HEIGHT = 750
+ZOOM_LEVELS = (8, 10, 12, 15, 20, 25, 30, 40, 50, 60) # Cell sizes in pixels
+PAN_SPEED = 20 # Pixels per frame while an arrow key is held
+
 TITLE = "PyMinesweeper"
 FPS = 60
 
+# Dirty-rectangle rendering: keep the board on its own surface and only redraw
+# and push the cells that changed. Set to False to redraw everything each frame.
+DIRTY_RECT_RENDERING = True
+MAX_DIRTY_RECTS = 256 # More changed cells than this are pushed as one bounding rect
+
+# Event-driven loop: block on pygame.event.wait between inputs instead of
+# redrawing FPS times a second. Set to False for the fixed-rate loop.
+EVENT_DRIVEN = True
+CLOCK_EVENT = pygame.USEREVENT + 1 # Fired once a second so the timer display still ticks
+PAN_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN)
+
+# --- Performance Overlay ---
+# F3 shows frame timings, F4 saves them to PERF_CSV_FILE, F5 starts/stops cProfile
+PERF_HISTORY = 600 # Frames kept for the CSV dump (10 seconds at 60 FPS)
+PERF_HISTOGRAM_FRAMES = 120 # Frames shown as bars in the overlay
+PERF_TEXT_FRAMES = 15 # Frames between refreshes of the overlay's numbers
+PERF_CSV_FILE = "perf_frames.csv"
+PERF_PROFILE_FILE = "minesweeper.prof"
+
+# --- Save Game ---
+# Closing the window mid-game saves it here, and the next start resumes it
+SAVE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'savegame.msw')
+
 # --- Colors ---
 COLOR_HIDDEN = (192, 192, 192)      # Light gray
 COLOR_REVEALED = (220, 220, 220)    # Lighter gray
@@ -106,74 +195,411 @@ COLOR_NUMBERS = {
 }
 
 # --- Game Setup ---
-# We set up fonts and clock here, but the screen is set later
-clock = pygame.time.Clock()
-main_font = pygame.font.Font(None, 36) # Font for numbers
-ui_font = pygame.font.Font(None, 42) # Font for messages
-
-# --- Cell Class (Helper) ---
-class Cell:
-    """Holds all data for a single cell."""
-    def __init__(self, row, col):
-        self.row = row
-        self.col = col
-        self.rect = pygame.Rect(col * CELL_SIZE, row * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-        
-        self.is_mine = False
-        self.adjacent_mines = 0
-        self.is_revealed = False
-        self.is_flagged = False
-
-    def draw(self, surface):
-        """Draws the cell based on its state."""
-        # --- Draw Background ---
-        if self.is_revealed:
-            pygame.draw.rect(surface, COLOR_REVEALED, self.rect)
-            # If revealed, draw what's inside
-            if self.is_mine:
-                # Draw a mine (red circle)
-                center = self.rect.center
-                pygame.draw.circle(surface, COLOR_MINE, center, CELL_SIZE // 3)
-            elif self.adjacent_mines > 0:
-                # Draw the number
-                text_surf = main_font.render(str(self.adjacent_mines), True, COLOR_NUMBERS[self.adjacent_mines])
-                text_rect = text_surf.get_rect(center=self.rect.center)
-                surface.blit(text_surf, text_rect)
-        else:
-            # Not revealed, draw hidden
-            pygame.draw.rect(surface, COLOR_HIDDEN, self.rect)
-            if self.is_flagged:
-                # Draw a flag (Orange 'F')
-                text_surf = main_font.render("F", True, COLOR_FLAG)
-                text_rect = text_surf.get_rect(center=self.rect.center)
-                surface.blit(text_surf, text_rect)
-        
-        # --- Draw Grid Border ---
-        pygame.draw.rect(surface, COLOR_GRID, self.rect, 1)
+# init() sets up pygame, the fonts and the clock; the screen is set later
+clock = None
+main_font = None # Font for numbers
+ui_font = None # Font for messages
+perf_font = None # Font for the performance overlay
+
+def init():
+    """
+    Starts pygame and creates the fonts and clock, then loads the sounds on a
+    background thread so the first window doesn't wait for them. Game()
+    calls this; calling it again does nothing.
+    """
+    global clock, main_font, ui_font, perf_font
+    if clock is not None:
+        return
+
+    pygame.init()
+    clock = pygame.time.Clock()
+    main_font = pygame.font.Font(None, 36)
+    ui_font = pygame.font.Font(None, 42)
+    perf_font = pygame.font.Font(None, 20)
+
+    try:
+        pygame.mixer.init()
+    except pygame.error as e:
+        # If sound system fails to initialize
+        print(f"Sound system error: {e} - game will run without sound effects")
+        return
+    audio.setup()
+    threading.Thread(target=load_sounds, name="load-sounds", daemon=True).start()
+
+# --- Tile Atlas ---
+class TileAtlas:
+    """
+    Pre-rendered surfaces for every cell state, so drawing a cell is a single blit.
+    The tiles are rebuilt automatically when the cell size changes.
+    """
+    # Tiles 0-8 are revealed cells showing that many adjacent mines
+    HIDDEN = 9
+    FLAGGED = 10
+    MINE = 11
+
+    def __init__(self):
+        self.cell_size = None
+        self.tiles = []
+        self.pixels = None # Tile pixels as one (tile, x, y, rgb) array for whole-view redraws
+
+    def get_tiles(self, cell_size):
+        """Returns the tile surfaces for the given cell size, building them if needed."""
+        if cell_size != self.cell_size:
+            self.build(cell_size)
+        return self.tiles
+
+    def build(self, cell_size):
+        """Renders one surface per tile state."""
+        font = pygame.font.Font(None, cell_size * 6 // 5) # Size 36 for 30px cells
+        rect = pygame.Rect(0, 0, cell_size, cell_size)
+
+        def new_tile(background):
+            tile = pygame.Surface(rect.size)
+            tile.fill(background)
+            return tile
+
+        def add_text(tile, text, color):
+            text_surf = font.render(text, True, color)
+            tile.blit(text_surf, text_surf.get_rect(center=rect.center))
+
+        tiles = []
+        # Revealed numbers (0 is blank)
+        for count in range(9):
+            tile = new_tile(COLOR_REVEALED)
+            if count > 0:
+                add_text(tile, str(count), COLOR_NUMBERS[count])
+            tiles.append(tile)
+
+        # Hidden cell
+        tiles.append(new_tile(COLOR_HIDDEN))
+
+        # Flagged cell (Orange 'F')
+        tile = new_tile(COLOR_HIDDEN)
+        add_text(tile, "F", COLOR_FLAG)
+        tiles.append(tile)
+
+        # Revealed mine (red circle)
+        tile = new_tile(COLOR_REVEALED)
+        pygame.draw.circle(tile, COLOR_MINE, rect.center, cell_size // 3)
+        tiles.append(tile)
+
+        # Grid border on every tile
+        for tile in tiles:
+            pygame.draw.rect(tile, COLOR_GRID, rect, 1)
+
+        self.cell_size = cell_size
+        self.tiles = tiles
+        self.pixels = np.stack([pygame.surfarray.array3d(tile) for tile in tiles])
+
+    def render_block(self, indices):
+        """
+        Builds one surface showing a block of tiles, given their indices
+        as a (rows, cols) array. NumPy copies the pixels in one go, so this
+        is much faster than blitting every tile of a large view.
+        """
+        rows, cols = indices.shape
+        size = self.cell_size
+        block = self.pixels[indices] # (rows, cols, x, y, rgb)
+        block = block.transpose(1, 2, 0, 3, 4).reshape(cols * size, rows * size, 3)
+        return pygame.surfarray.make_surface(block)
+
+    @staticmethod
+    def tile_index(board, row, col):
+        """Returns which tile shows the cell at (row, col)."""
+        if board.is_revealed[row, col]:
+            if board.is_mine[row, col]:
+                return TileAtlas.MINE
+            return int(board.adjacent_mines[row, col])
+        if board.is_flagged[row, col]:
+            return TileAtlas.FLAGGED
+        return TileAtlas.HIDDEN
+
+    @staticmethod
+    def tile_indices(board, rows, cols):
+        """Returns the tile index of every cell in a block, given row and column slices."""
+        is_revealed = board.is_revealed[rows, cols]
+        revealed_tiles = np.where(board.is_mine[rows, cols], TileAtlas.MINE, board.adjacent_mines[rows, cols])
+        hidden_tiles = np.where(board.is_flagged[rows, cols], TileAtlas.FLAGGED, TileAtlas.HIDDEN)
+        return np.where(is_revealed, revealed_tiles, hidden_tiles)
+
+
+class TextCache:
+    """Keeps one rendered surface per UI text slot, re-rendered only when the text changes."""
+    def __init__(self):
+        self.entries = {} # slot -> ((text, color), surface)
+
+    def render(self, slot, font, text, color):
+        """Returns the surface for a slot, rendering it only if its text or color changed."""
+        key = (text, color)
+        entry = self.entries.get(slot)
+        if entry is None or entry[0] != key:
+            entry = (key, font.render(text, True, color))
+            self.entries[slot] = entry
+        return entry[1]
+
+
+# --- Camera (Viewport) ---
+class Camera:
+    """
+    The scrollable, zoomable view onto the board. Maps between cells and
+    screen pixels so that only the cells inside the view are ever drawn.
+    rows and cols are None for an endless board, which the view never leaves.
+    """
+    def __init__(self, rows, cols, view_width, view_height, cell_size=CELL_SIZE):
+        self.rows = rows
+        self.cols = cols
+        self.view_width = view_width
+        self.view_height = view_height
+        self.cell_size = cell_size
+        self.x = 0 # Board pixel at the left edge of the view
+        self.y = 0 # Board pixel at the top edge of the view
+
+    def clamp(self):
+        """Keeps the view on the board."""
+        if self.rows is None:
+            return
+        self.x = max(0, min(self.x, self.cols * self.cell_size - self.view_width))
+        self.y = max(0, min(self.y, self.rows * self.cell_size - self.view_height))
+
+    def pan(self, dx, dy):
+        """Scrolls the view by (dx, dy) pixels. Returns True if it moved."""
+        old_position = (self.x, self.y)
+        self.x += dx
+        self.y += dy
+        self.clamp()
+        return (self.x, self.y) != old_position
+
+    def zoom(self, steps, focus_x, focus_y):
+        """
+        Moves steps levels through ZOOM_LEVELS (positive zooms in), keeping the
+        board point under screen pixel (focus_x, focus_y) in place.
+        Returns True if the zoom changed.
+        """
+        # Start from the closest level in case the cell size isn't one of them
+        index = min(range(len(ZOOM_LEVELS)), key=lambda i: abs(ZOOM_LEVELS[i] - self.cell_size))
+        index = max(0, min(index + steps, len(ZOOM_LEVELS) - 1))
+        new_size = ZOOM_LEVELS[index]
+        if new_size == self.cell_size:
+            return False
+
+        self.x = (self.x + focus_x) * new_size // self.cell_size - focus_x
+        self.y = (self.y + focus_y) * new_size // self.cell_size - focus_y
+        self.cell_size = new_size
+        self.clamp()
+        return True
+
+    def visible_range(self):
+        """Returns (first_row, end_row, first_col, end_col) of the cells in view, ends exclusive."""
+        size = self.cell_size
+        first_row = self.y // size
+        first_col = self.x // size
+        end_row = (self.y + self.view_height + size - 1) // size
+        end_col = (self.x + self.view_width + size - 1) // size
+        if self.rows is not None:
+            end_row = min(end_row, self.rows)
+            end_col = min(end_col, self.cols)
+        return first_row, end_row, first_col, end_col
+
+    def cell_at(self, x, y):
+        """Returns the (row, col) under screen pixel (x, y), or None if there's no cell there."""
+        if not (0 <= x < self.view_width and 0 <= y < self.view_height):
+            return None
+
+        row = (y + self.y) // self.cell_size
+        col = (x + self.x) // self.cell_size
+        if self.rows is None or (row < self.rows and col < self.cols):
+            return row, col
+        return None
+
+    def cell_rect(self, row, col):
+        """Returns the screen rect of a cell (it may be partly outside the view)."""
+        size = self.cell_size
+        return pygame.Rect(col * size - self.x, row * size - self.y, size, size)
+
+
+# --- Performance Overlay ---
+class PerfOverlay:
+    """
+    Per-frame timings for the main loop, shown as a panel over the board.
+    The loop only calls mark() and end_frame() while enabled, so a hidden
+    overlay costs one attribute check per stage.
+    """
+    STAGES = ('events', 'update', 'draw', 'overlay', 'flip', 'tick')
+    SIZE = (240, 190)
+    TARGET_MS = 1000 / FPS
+
+    def __init__(self):
+        self.enabled = False
+        self.frames = collections.deque(maxlen=PERF_HISTORY) # Stage times (ms) per frame
+        self.current = [] # Stage times of the frame in progress
+        self.frame_count = 0 # Frames since enabled; frames stops growing once full
+        self.stage_start = 0.0
+        self.lines = [] # Text shown in the panel, refreshed every PERF_TEXT_FRAMES
+        self.background = None # What was under the panel when it was last drawn
+        self.drawn_rect = None
+        self.profiler = None
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.frames.clear()
+        self.current = []
+        self.frame_count = 0
+        self.lines = []
+        self.stage_start = time.perf_counter()
+
+    def mark(self):
+        """Ends the current stage of the frame."""
+        now = time.perf_counter()
+        self.current.append((now - self.stage_start) * 1000)
+        self.stage_start = now
+
+    def end_frame(self):
+        self.mark()
+        self.frames.append(self.current)
+        self.current = []
+        self.frame_count += 1
+
+    def update_text(self):
+        """Recomputes the panel's numbers from the recent frames."""
+        recent = list(self.frames)[-PERF_HISTOGRAM_FRAMES:]
+        if not recent:
+            self.lines = ["Collecting frames..."]
+            return
+        totals = [sum(frame) for frame in recent]
+        self.lines = [
+            f"FPS {clock.get_fps():5.1f}",
+            f"frame {sum(totals) / len(totals):6.2f} ms avg {max(totals):6.2f} max",
+        ] + [
+            f"{stage:>8} {sum(frame[index] for frame in recent) / len(recent):6.2f} ms"
+            for index, stage in enumerate(self.STAGES)
+        ]
+
+    def draw(self, screen, clip):
+        """Draws the panel in the top-left corner of clip and returns its rect."""
+        rect = pygame.Rect((0, 0), self.SIZE).clip(clip)
+        if self.background is None or self.background.get_size() != rect.size:
+            self.background = pygame.Surface(rect.size)
+        self.background.blit(screen, (0, 0), rect) # Saved so erase() can put it back
+        self.drawn_rect = rect
+
+        if not self.lines or self.frame_count % PERF_TEXT_FRAMES == 0:
+            self.update_text()
+
+        screen.set_clip(rect)
+        screen.fill(COLOR_BLACK, rect)
+        y = 4
+        for index, line in enumerate(self.lines):
+            surface = text_cache.render(f"perf{index}", perf_font, line, COLOR_WHITE)
+            screen.blit(surface, (6, y))
+            y += surface.get_height()
+
+        # Frame time histogram: one bar per frame, 2 pixels per millisecond
+        base = self.SIZE[1] - 4
+        recent = list(self.frames)[-PERF_HISTOGRAM_FRAMES:]
+        for x, frame in enumerate(recent, start=6):
+            total = sum(frame)
+            color = COLOR_FLAG if total > self.TARGET_MS else (0, 200, 0)
+            pygame.draw.line(screen, color, (x, base), (x, base - min(total * 2, 60)))
+        target_y = base - int(self.TARGET_MS * 2)
+        pygame.draw.line(screen, COLOR_GRID, (6, target_y), (6 + PERF_HISTOGRAM_FRAMES, target_y))
+        screen.set_clip(None)
+        return rect
+
+    def erase(self, screen):
+        """Puts back what was under the panel. Returns the rect, or None if nothing was drawn."""
+        rect = self.drawn_rect
+        if rect is not None:
+            screen.blit(self.background, rect)
+            self.drawn_rect = None
+        return rect
+
+    def save_csv(self, path=PERF_CSV_FILE):
+        """Writes the recorded frames, one row of stage times per frame."""
+        with open(path, 'w') as file:
+            file.write("frame,total_ms," + ",".join(f"{stage}_ms" for stage in self.STAGES) + "\n")
+            for number, frame in enumerate(self.frames):
+                file.write(f"{number},{sum(frame):.4f}," + ",".join(f"{ms:.4f}" for ms in frame) + "\n")
+        print(f"Saved {len(self.frames)} frame timings to {path}")
+
+    def toggle_profiler(self, path=PERF_PROFILE_FILE):
+        """Starts cProfile, or stops it and saves and prints the results."""
+        if self.profiler is None:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+            print("Profiling started (F5 to stop)")
+            return
+        self.profiler.disable()
+        self.profiler.dump_stats(path)
+        print(f"Profile saved to {path}")
+        pstats.Stats(self.profiler).sort_stats('cumulative').print_stats(15)
+        self.profiler = None
+
+
+tile_atlas = TileAtlas()
+text_cache = TextCache()
+perf_overlay = PerfOverlay()
 
 # --- Game Class ---
 # We wrap all game logic and state in this class
 class Game:
-    def __init__(self):
+    def __init__(self, custom=None):
+        init()
         self.screen = None
         self.rows = 0
         self.cols = 0
         self.mines = 0
         self.screen_width = 0
         self.screen_height = 0
+        self.view_width = 0 # Size of the board area of the window
+        self.view_height = 0
+        self.camera = None
+        self.custom = custom # {'rows', 'cols', 'mines'} for a custom-size board
         
-        self.board = []
+        self.board = None
         self.game_over = False
         self.won = False
         self.flags_placed = 0
         self.first_click = True # Added for "Safe First Click" logic
         self.start_time = None # Timer for tracking game duration
+        self.seed = None # Mine placement seed (None picks a new random board each game)
+        self.no_guess = False # Only deal boards the solver can clear without guessing
+        self.pools = {} # (rows, cols, mines) -> noguess.BoardPool for the presets
+        self.record_path = None # File each game's clicks are appended to (see replay.py)
+        self.clicks = [] # [ms since first click, button, row, col] of the current game
+        self.resumed = False # The current game came from a save, so its earlier clicks are unknown
+        self.save_path = SAVE_FILE
+        self.endless = False # Play on an infinite.InfiniteBoard instead of a fixed size
+
+        # --- Dirty-rectangle rendering state ---
+        self.dirty_rendering = DIRTY_RECT_RENDERING
+        self.event_driven = EVENT_DRIVEN
+        self.board_surface = None # Persistent copy of the drawn grid
+        self.dirty_cells = [] # Arrays of flat cell indices changed since the last frame
+        self.full_redraw = True
+        self.ui_state = None # (flags, seconds, first click) last drawn in the UI bar
+        self.overlay_drawn = False
+        self.dim_surface = None # Cached game over dimming layer
+
+    def next_events(self, block):
+        """Returns the pending events, first waiting for one if block is True."""
+        if block:
+            return [pygame.event.wait()] + pygame.event.get()
+        return pygame.event.get()
+
+    def idle(self):
+        """True if nothing on screen changes until the next event, so the game loop can wait."""
+        if perf_overlay.enabled:
+            return False # The overlay measures every frame
+        if self.game_over:
+            return True
+        keys = pygame.key.get_pressed()
+        return not any(keys[key] for key in PAN_KEYS) # Panning moves every frame
 
     def start_screen(self):
         """Displays the difficulty selection screen and waits for input."""
         # Use largest dimensions for start screen
         temp_width = DIFFICULTIES['hard']['cols'] * CELL_SIZE
-        temp_height = DIFFICULTIES['hard']['rows'] * CELL_SIZE + 50
+        temp_height = DIFFICULTIES['hard']['rows'] * CELL_SIZE + UI_BAR_HEIGHT
         self.screen = pygame.display.set_mode((temp_width, temp_height))
         pygame.display.set_caption("Choose Difficulty")
 
@@ -183,15 +609,46 @@ class Game:
         easy_text = main_font.render("Press 'E' for Easy (9x9, 10 Mines)", True, COLOR_WHITE)
         medium_text = main_font.render("Press 'M' for Medium (16x16, 40 Mines)", True, COLOR_WHITE)
         hard_text = main_font.render("Press 'H' for Hard (16x30, 99 Mines)", True, COLOR_WHITE)
+        custom_text = main_font.render("Press 'C' for Custom (any size)", True, COLOR_WHITE)
+        custom_help_text = main_font.render("Type: rows cols mines, then Enter", True, COLOR_WHITE)
+
+        # Custom size entry starts from the last custom board, if any
+        custom_input = ""
+        if self.custom:
+            custom_input = f"{self.custom['rows']} {self.custom['cols']} {self.custom['mines']}"
+        custom_error = ""
         
         # --- Phase 1: Welcome Screen ---
         phase = "welcome"
         running = True
+        drawn = False
         while running:
-            for event in pygame.event.get():
+            # The menu only changes on input, so wait for it once the screen is drawn
+            for event in self.next_events(self.event_driven and drawn):
                 if event.type == pygame.QUIT:
                     pygame.quit()
                     sys.exit()
+                if event.type == pygame.KEYDOWN and phase == "custom":
+                    # --- Custom size entry ---
+                    if event.key == pygame.K_RETURN:
+                        try:
+                            rows, cols, mines = (int(value) for value in custom_input.split())
+                        except ValueError:
+                            custom_error = "Enter three numbers"
+                            continue
+                        try:
+                            self.setup_window(rows, cols, mines)
+                        except ValueError as error:
+                            custom_error = str(error)
+                            continue
+                        self.custom = {'rows': rows, 'cols': cols, 'mines': mines}
+                        return # Exit start screen
+                    elif event.key == pygame.K_ESCAPE:
+                        phase = "difficulty"
+                    elif event.key == pygame.K_BACKSPACE:
+                        custom_input = custom_input[:-1]
+                    elif event.unicode.isdigit() or event.unicode == " ":
+                        custom_input += event.unicode
                 if event.type == pygame.KEYUP:
                     if phase == "welcome":
                         phase = "difficulty" # Move to next phase
@@ -203,15 +660,11 @@ class Game:
                             settings = DIFFICULTIES['medium']
                         elif event.key == pygame.K_h:
                             settings = DIFFICULTIES['hard']
+                        elif event.key == pygame.K_c:
+                            phase = "custom"
                         
                         if settings:
-                            self.rows = settings['rows']
-                            self.cols = settings['cols']
-                            self.mines = settings['mines']
-                            self.screen_width = self.cols * CELL_SIZE
-                            self.screen_height = self.rows * CELL_SIZE + 50
-                            self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
-                            pygame.display.set_caption(TITLE)
+                            self.setup_window(settings['rows'], settings['cols'], settings['mines'])
                             return # Exit start screen
             
             # Draw
@@ -224,162 +677,449 @@ class Game:
                 self.screen.blit(easy_text, (temp_width // 2 - easy_text.get_width() // 2, 200))
                 self.screen.blit(medium_text, (temp_width // 2 - medium_text.get_width() // 2, 250))
                 self.screen.blit(hard_text, (temp_width // 2 - hard_text.get_width() // 2, 300))
+                self.screen.blit(custom_text, (temp_width // 2 - custom_text.get_width() // 2, 350))
+            elif phase == "custom":
+                input_text = ui_font.render(custom_input + "_", True, COLOR_FLAG)
+                error_text = main_font.render(custom_error, True, COLOR_MINE)
+                self.screen.blit(custom_help_text, (temp_width // 2 - custom_help_text.get_width() // 2, 200))
+                self.screen.blit(input_text, (temp_width // 2 - input_text.get_width() // 2, 260))
+                self.screen.blit(error_text, (temp_width // 2 - error_text.get_width() // 2, 330))
             
             pygame.display.flip()
+            drawn = True
+
+    def setup_window(self, rows, cols, mines):
+        """
+        Sizes the window and camera for a board. Boards bigger than
+        MAX_VIEW_WIDTH x MAX_VIEW_HEIGHT get a scrollable view.
+        Raises ValueError for impossible or too big settings.
+        """
+        validate_board_size(rows, cols, mines)
+        self.rows = rows
+        self.cols = cols
+        self.mines = mines
+        self.view_width = min(cols * CELL_SIZE, MAX_VIEW_WIDTH)
+        self.view_height = min(rows * CELL_SIZE, MAX_VIEW_HEIGHT)
+        self.screen_width = self.view_width
+        self.screen_height = self.view_height + UI_BAR_HEIGHT
+        self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
+        pygame.display.set_caption(TITLE)
+        self.camera = Camera(rows, cols, self.view_width, self.view_height)
+
+    def setup_endless_window(self):
+        """Sizes the window and camera for an endless board, with cell (0, 0) in the middle."""
+        self.rows = None
+        self.cols = None
+        self.mines = 0
+        self.view_width = MAX_VIEW_WIDTH
+        self.view_height = MAX_VIEW_HEIGHT
+        self.screen_width = self.view_width
+        self.screen_height = self.view_height + UI_BAR_HEIGHT
+        self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
+        pygame.display.set_caption(f"{TITLE} - Endless")
+        self.camera = Camera(None, None, self.view_width, self.view_height)
+        self.camera.x = -self.view_width // 2
+        self.camera.y = -self.view_height // 2
+
     def create_board(self, safe_row, safe_col):
         """
-        Initializes the 2D grid of Cell objects, ensuring the first click is safe.
+        Initializes the board engine, ensuring the first click is safe.
         Mines are placed *after* the first click, avoiding the safe cell and its neighbors.
         """
-        board = [[Cell(row, col) for col in range(self.cols)] for row in range(self.rows)]
-        
-        # --- 1. Create a set of "unsafe" cells ---
-        # This includes the clicked cell and its 8 neighbors
-        unsafe_cells = set()
-        for dr in [-1, 0, 1]:
-            for dc in [-1, 0, 1]:
-                nr, nc = safe_row + dr, safe_col + dc
-                if 0 <= nr < self.rows and 0 <= nc < self.cols:
-                    unsafe_cells.add((nr, nc))
-
-        # --- 2. Place Mines ---
-        placed_mines = 0
-        while placed_mines < self.mines:
-            row = random.randint(0, self.rows - 1)
-            col = random.randint(0, self.cols - 1)
-            
-            # Place a mine only if it's not the first click spot or its neighbors
-            if (row, col) not in unsafe_cells and not board[row][col].is_mine:
-                board[row][col].is_mine = True
-                placed_mines += 1
-                
-        # --- 3. Calculate Adjacent Mines ---
-        for r in range(self.rows):
-            for c in range(self.cols):
-                if not board[r][c].is_mine:
-                    count = 0
-                    # Check all 8 neighbors
-                    for dr in [-1, 0, 1]:
-                        for dc in [-1, 0, 1]:
-                            if dr == 0 and dc == 0:
-                                continue
-                            
-                            nr, nc = r + dr, c + dc
-                            
-                            # Check boundaries
-                            if 0 <= nr < self.rows and 0 <= nc < self.cols and board[nr][nc].is_mine:
-                                count += 1
-                    board[r][c].adjacent_mines = count
-                    
-        return board
+        if self.endless:
+            return infinite.InfiniteBoard(self.seed, safe_cell=(safe_row, safe_col))
+        if self.no_guess:
+            board = self.create_no_guess_board(safe_row, safe_col)
+            if board is not None:
+                return board
+        return engine.create_board(self.rows, self.cols, self.mines, safe_row, safe_col, self.seed)
+
+    def create_no_guess_board(self, safe_row, safe_col):
+        """
+        Takes a board from the pre-generated pool whose opening contains the
+        clicked cell, or tries to generate one now if the pool has none.
+        Generating is capped at noguess.CLICK_TIME_LIMIT, and skipped above
+        noguess.CLICK_MAX_CELLS, so the click never freezes the window;
+        returns None if no no-guess board was found.
+        """
+        pool = self.pools.get((self.rows, self.cols, self.mines))
+        if pool is not None and self.seed is None:
+            pooled = pool.take(safe_row, safe_col)
+            if pooled is not None:
+                seed, start_row, start_col = pooled
+                # Built from its own start cell; the click opens the same region
+                return engine.create_board(self.rows, self.cols, self.mines, start_row, start_col, seed)
+
+        seed = None
+        if self.rows * self.cols <= noguess.CLICK_MAX_CELLS:
+            seed = noguess.generate(self.rows, self.cols, self.mines, safe_row, safe_col, self.seed,
+                                    time_limit=noguess.CLICK_TIME_LIMIT)
+        if seed is None:
+            print("No no-guess board ready for this click, dealing a normal board")
+            return None
+        return engine.create_board(self.rows, self.cols, self.mines, safe_row, safe_col, seed)
 
     def reveal_cell(self, row, col):
         """
-        Recursively reveals cells (flood fill).
+        Reveals a cell through the board engine (flood fill on 0s).
         Returns False if a mine was hit, True otherwise.
         """
-        cell = self.board[row][col]
-        
-        # --- Base cases to stop recursion ---
-        if cell.is_flagged or cell.is_revealed:
-            return True # Not a mine, but don't continue
+        cells = self.board.reveal(row, col)
+        self.mark_dirty(cells)
+        self.play_reveal_sounds(cells)
+        return not self.board.exploded
 
-        # --- Process this cell ---
-        cell.is_revealed = True
-        
-        if cell.is_mine:
+    def mark_dirty(self, cells):
+        """
+        Queues cells to be redrawn on the next frame: flat indices, or an
+        (n, 2) array of (row, col) on an endless board (see cell_id).
+        """
+        self.dirty_cells.append(np.asarray(cells, dtype=np.int64))
+
+    def cell_id(self, row, col):
+        """Returns how the board identifies a cell in mark_dirty."""
+        if self.endless:
+            return (row, col)
+        return row * self.cols + col
+
+    def cell_positions(self, cells):
+        """Returns the (rows, cols) arrays of cells given as mark_dirty takes them."""
+        if self.endless:
+            cells = np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+            return cells[:, 0], cells[:, 1]
+        return np.divmod(cells, self.cols)
+
+    def play_reveal_sounds(self, cells):
+        """Queues the sounds for newly revealed cells."""
+        rows, cols = self.cell_positions(cells)
+        hit_mine = np.asarray(self.board.is_mine[rows, cols], dtype=bool)
+        if hit_mine.any():
             # Play explosion sound when hitting a mine
-            play_sound(explosion_sound)
-            return False # Hit a mine! Game over.
-
-        # Play click sound for safe cells (but not for 0s to avoid sound spam)
-        if cell.adjacent_mines > 0:
-            play_sound(click_sound)
-
-        # --- Recursive step (if cell is 0) ---
-        if cell.adjacent_mines == 0:
-            for dr in [-1, 0, 1]:
-                for dc in [-1, 0, 1]:
-                    if dr == 0 and dc == 0:
-                        continue
-                    
-                    nr, nc = row + dr, col + dc
-                    
-                    # Check boundaries and if not already revealed
-                    if 0 <= nr < self.rows and 0 <= nc < self.cols and not self.board[nr][nc].is_revealed:
-                        self.reveal_cell(nr, nc) # Recursive call
-                        
-        return True # Safe
+            audio.queue('explosion')
+
+        # Play click sound for safe cells (but not for 0s); the bus plays one per frame however many there are
+        if ((np.asarray(self.board.adjacent_mines[rows, cols]) > 0) & ~hit_mine).any():
+            audio.queue('click')
 
     def check_win_condition(self):
         """Checks if the player has won."""
         # Don't check win condition if board hasn't been created yet
-        if not self.board:
+        if self.board is None:
             return False
-            
-        for row in range(self.rows):
-            for col in range(self.cols):
-                cell = self.board[row][col]
-                # If there's a non-mine cell that is still hidden, not a win
-                if not cell.is_mine and not cell.is_revealed:
-                    return False
-        return True # All non-mine cells are revealed
-
-    def draw_board(self):
-        """Draws the entire grid."""
-        # If board hasn't been created yet, draw empty grid
-        if not self.board:
-            self.draw_empty_grid()
+
+        return self.board.check_win()
+
+    def lose_game(self):
+        """Ends the game after a mine was hit and shows all the mines."""
+        self.game_over = True
+        self.won = False
+        self.board.reveal_mines()
+        if self.endless:
+            self.full_redraw = True # Mines are everywhere in view
+        else:
+            self.mark_dirty(self.board.mine_cells)
+
+    def cell_rect(self, row, col):
+        """Computes the screen rect of a cell on demand (cells don't store one)."""
+        return self.camera.cell_rect(row, col)
+
+    def draw_cell(self, surface, row, col):
+        """Draws a single cell with one blit from the tile atlas and returns its rect."""
+        tiles = tile_atlas.get_tiles(self.camera.cell_size)
+        rect = self.cell_rect(row, col)
+        surface.blit(tiles[TileAtlas.tile_index(self.board, row, col)], rect)
+        return rect
+
+    def draw_board(self, surface=None):
+        """Draws the cells inside the camera's view (the whole grid if it fits)."""
+        if surface is None:
+            surface = self.screen
+
+        first_row, end_row, first_col, end_col = self.camera.visible_range()
+        if self.board is None:
+            # If board hasn't been created yet, draw empty grid
+            indices = np.full((end_row - first_row, end_col - first_col), TileAtlas.HIDDEN)
+        else:
+            indices = TileAtlas.tile_indices(self.board, slice(first_row, end_row), slice(first_col, end_col))
+
+        # Compose the view from the atlas in one step, so the cost depends on the window size only
+        if indices.size == 0:
             return
-            
-        for row in range(self.rows):
-            for col in range(self.cols):
-                self.board[row][col].draw(self.screen)
-
-    def draw_empty_grid(self):
-        """Draws an empty grid before the first click."""
-        for row in range(self.rows):
-            for col in range(self.cols):
-                rect = pygame.Rect(col * CELL_SIZE, row * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-                # Draw hidden cell
-                pygame.draw.rect(self.screen, COLOR_HIDDEN, rect)
-                # Draw grid border
-                pygame.draw.rect(self.screen, COLOR_GRID, rect, 1)
+        tile_atlas.get_tiles(self.camera.cell_size)
+        surface.blit(tile_atlas.render_block(indices), self.cell_rect(first_row, first_col))
+
+    def elapsed_seconds(self):
+        """Returns the whole seconds since the first click, or None before it."""
+        if self.start_time is None:
+            return None
+        return (pygame.time.get_ticks() - self.start_time) // 1000
+
+    def draw_ui_bar(self):
+        """Draws the flag count, timer and instructions bar and returns its rect."""
+        ui_bar_rect = pygame.Rect(0, self.view_height, self.screen_width, UI_BAR_HEIGHT)
+        pygame.draw.rect(self.screen, COLOR_BLACK, ui_bar_rect)
+        
+        # Draw flag count
+        flag_count = f"Flags: {self.flags_placed}" if self.endless else f"Flags: {self.flags_placed} / {self.mines}"
+        flag_text = text_cache.render("flags", ui_font, flag_count, COLOR_FLAG)
+        flag_rect = flag_text.get_rect(midleft=(20, ui_bar_rect.centery))
+        self.screen.blit(flag_text, flag_rect)
+        
+        # Draw timer
+        elapsed_seconds = self.elapsed_seconds()
+        if elapsed_seconds is not None:
+            timer_text = text_cache.render("timer", ui_font, f"Time: {elapsed_seconds}s", COLOR_WHITE)
+            timer_rect = timer_text.get_rect(center=(self.screen_width // 2, ui_bar_rect.centery))
+            self.screen.blit(timer_text, timer_rect)
+        
+        # If it's the first click, show instruction
+        if self.first_click:
+            instruction_text = text_cache.render("instruction", main_font, "Click anywhere to start!", COLOR_WHITE)
+            instruction_rect = instruction_text.get_rect(midright=(self.screen_width - 20, ui_bar_rect.centery))
+            self.screen.blit(instruction_text, instruction_rect)
+
+        return ui_bar_rect
+
+    def draw_game_over(self):
+        """Draws the win or loss message over the board."""
+        if self.won:
+            self.draw_ui("You Win!", (0, 255, 0)) # Green
+        else:
+            self.draw_ui("You Hit a Mine!", COLOR_MINE)
+
+    def draw_frame(self):
+        """Redraws the whole window."""
+        self.screen.fill(COLOR_REVEALED) # Background
+        # Keep partly visible cells at the view's edge out of the UI bar
+        self.screen.set_clip(pygame.Rect(0, 0, self.view_width, self.view_height))
+        self.draw_board()
+        self.screen.set_clip(None)
+        self.draw_ui_bar()
+
+        if self.game_over:
+            self.draw_game_over()
+
+    def draw_changes(self):
+        """
+        Dirty-rectangle rendering: redraws only the cells and UI that changed
+        since the last frame and returns the screen rects that need updating.
+        """
+        changed_rects = []
+
+        # --- Board: the whole view after a new game or camera move, otherwise only changed cells ---
+        view_rect = pygame.Rect(0, 0, self.view_width, self.view_height)
+        first_row, end_row, first_col, end_col = self.camera.visible_range()
+        visible_cells = (end_row - first_row) * (end_col - first_col)
+        if sum(len(cells) for cells in self.dirty_cells) > visible_cells:
+            self.full_redraw = True # Cheaper to redraw the view than each changed cell
+
+        if self.full_redraw:
+            if self.board_surface is None or self.board_surface.get_size() != view_rect.size:
+                self.board_surface = pygame.Surface(view_rect.size)
+            self.board_surface.fill(COLOR_REVEALED) # Background around small boards
+            self.draw_board(self.board_surface)
+            self.screen.blit(self.board_surface, (0, 0))
+            changed_rects.append(view_rect)
+            self.dirty_cells = []
+            self.full_redraw = False
+        elif self.dirty_cells:
+            cells = np.unique(np.concatenate(self.dirty_cells), axis=0)
+            self.dirty_cells = []
+
+            # Changed cells outside the view are drawn when the camera reaches them
+            rows, cols = self.cell_positions(cells)
+            in_view = (rows >= first_row) & (rows < end_row) & (cols >= first_col) & (cols < end_col)
+            for row, col in zip(rows[in_view].tolist(), cols[in_view].tolist()):
+                rect = self.draw_cell(self.board_surface, row, col).clip(view_rect)
+                self.screen.blit(self.board_surface, rect, rect)
+                changed_rects.append(rect)
+
+            if len(changed_rects) > MAX_DIRTY_RECTS:
+                changed_rects = [changed_rects[0].unionall(changed_rects)]
+
+        # --- UI bar: only when the flag count or the timer second changes ---
+        if not self.game_over:
+            ui_state = (self.flags_placed, self.elapsed_seconds(), self.first_click)
+            if ui_state != self.ui_state:
+                self.ui_state = ui_state
+                changed_rects.append(self.draw_ui_bar())
+
+        # --- Game over message: drawn once on top of the final board ---
+        if self.game_over and not self.overlay_drawn:
+            self.draw_game_over()
+            self.overlay_drawn = True
+            changed_rects = [self.screen.get_rect()]
+
+        return changed_rects
 
     def draw_ui(self, message, color):
         """Draws the game over/win message."""
-        # Dim the screen
-        dim_surface = pygame.Surface((self.screen_width, self.screen_height))
-        dim_surface.set_alpha(150)
-        dim_surface.fill(COLOR_BLACK)
-        self.screen.blit(dim_surface, (0, 0))
+        # Dim the screen (the dim surface is only rebuilt when the window size changes)
+        if self.dim_surface is None or self.dim_surface.get_size() != self.screen.get_size():
+            self.dim_surface = pygame.Surface(self.screen.get_size())
+            self.dim_surface.set_alpha(150)
+            self.dim_surface.fill(COLOR_BLACK)
+        self.screen.blit(self.dim_surface, (0, 0))
 
         # Draw the text
-        text_surf = ui_font.render(message, True, color)
-        text_rect = text_surf.get_rect(center=(self.screen_width / 2, (self.rows * CELL_SIZE) / 2 - 40))
+        text_surf = text_cache.render("message", ui_font, message, color)
+        text_rect = text_surf.get_rect(center=(self.screen_width / 2, self.view_height / 2 - 40))
         self.screen.blit(text_surf, text_rect)
         
-        text_surf_2 = ui_font.render("Press 'R' to restart", True, COLOR_WHITE)
-        text_rect_2 = text_surf_2.get_rect(center=(self.screen_width / 2, (self.rows * CELL_SIZE) / 2 + 10))
+        text_surf_2 = text_cache.render("restart", ui_font, "Press 'R' to restart", COLOR_WHITE)
+        text_rect_2 = text_surf_2.get_rect(center=(self.screen_width / 2, self.view_height / 2 + 10))
         self.screen.blit(text_surf_2, text_rect_2)
 
-    def main_game_loop(self):
-        """This is the main loop for a single game session."""
+    def erase_perf_overlay(self):
+        """Removes the performance panel from the screen when it is switched off."""
+        rect = perf_overlay.erase(self.screen)
+        if rect is not None:
+            pygame.display.update(rect)
+
+    def new_game(self):
+        """Resets the game state for a new game on the current window."""
         # --- BOARD IS NOT CREATED YET ---
-        self.board = [] # Start with an empty board
+        self.board = None # Start with no board
         self.game_over = False
         self.won = False
         self.flags_placed = 0
         self.first_click = True # Reset for each new game
         self.start_time = None # Reset timer for each new game
+        self.clicks = []
+        self.resumed = False
+        self.dirty_cells = []
+        self.full_redraw = True # Repaint the whole window for the new game
+        self.ui_state = None
+        self.overlay_drawn = False
+        perf_overlay.drawn_rect = None # The window was just set up, nothing to erase
+
+    def handle_click(self, button, row, col):
+        """Applies a left (1), middle (2) or right (3) click on a cell."""
+        # --- Handle First Click ---
+        if self.first_click:
+            # 1. Create the board *now*
+            self.board = self.create_board(row, col)
+            # 2. Start the timer
+            self.start_time = pygame.time.get_ticks()
+            if self.event_driven:
+                pygame.time.set_timer(CLOCK_EVENT, 1000) # Restart in step with the timer's seconds
+            # 3. Mark first click as done
+            self.first_click = False
+
+        if self.record_path is not None:
+            self.clicks.append([pygame.time.get_ticks() - self.start_time, button, row, col])
+
+        # --- Left Click ---
+        if button == 1:
+            if not self.board.is_flagged[row, col]:
+                if not self.reveal_cell(row, col):
+                    # Hit a mine!
+                    self.lose_game()
+        
+        # --- Right Click ---
+        elif button == 3:
+            if self.board.toggle_flag(row, col):
+                self.flags_placed = self.board.flags_placed
+                self.mark_dirty([self.cell_id(row, col)])
+                audio.queue('flag')  # Play sound when flagging/unflagging
+        
+        # --- Middle Click (Chording) ---
+        elif button == 2:
+            # Reveals unflagged neighbors once the flag count matches the number
+            cells = self.board.chord(row, col)
+            self.mark_dirty(cells)
+            self.play_reveal_sounds(cells)
+            if self.board.exploded:
+                # Hit a mine! Game over
+                self.lose_game()
+
+        # --- Check Win (only a click can change the board) ---
+        if not self.game_over and self.check_win_condition():
+            self.game_over = True
+            self.won = True
+            audio.queue('win')  # Play sound when winning
+
+    def save_recording(self):
+        """Appends the current game's seed and clicks to record_path as one JSON line."""
+        if self.record_path is None or self.board is None or not self.clicks or self.endless:
+            return
+        if self.resumed:
+            return # The clicks before the save weren't kept, so it couldn't be replayed
+        record = {
+            'rows': self.rows, 'cols': self.cols, 'mines': self.mines,
+            'seed': self.board.seed, 'safe_cell': list(self.board.safe_cell),
+            'clicks': self.clicks,
+            'won': self.won, 'exploded': bool(self.board.exploded), 'digest': self.board.digest(),
+        }
+        with open(self.record_path, 'a') as file:
+            file.write(json.dumps(record, separators=(',', ':')) + "\n")
+        self.clicks = []
+
+    def save_game(self):
+        """Saves a game in progress so the next start can resume it."""
+        if self.board is None or self.game_over or self.endless:
+            return
+        try:
+            savegame.save(self.save_path, self.board, pygame.time.get_ticks() - self.start_time)
+            print(f"Game saved to {self.save_path}")
+        except (OSError, ValueError) as error:
+            print(f"Could not save the game: {error}")
+
+    def load_game(self):
+        """
+        Loads and removes the saved game, if there is one.
+        Returns (board, elapsed_ms) or None.
+        """
+        if not os.path.exists(self.save_path):
+            return None
+        try:
+            saved = savegame.load(self.save_path)
+        except (OSError, ValueError) as error:
+            print(f"Could not load the saved game: {error}")
+            return None
+        os.remove(self.save_path) # A resumed game is saved again only if it's quit again
+        print(f"Resumed the game saved in {self.save_path}")
+        return saved
+
+    def main_game_loop(self, saved=None):
+        """
+        This is the main loop for a single game session.
+        saved is a (board, elapsed_ms) pair from load_game to continue.
+        """
+        self.new_game()
+        if saved is not None:
+            self.board, elapsed_ms = saved
+            self.flags_placed = self.board.flags_placed
+            self.first_click = False
+            self.start_time = pygame.time.get_ticks() - elapsed_ms
+            self.resumed = True
+
+        if self.event_driven:
+            pygame.time.set_timer(CLOCK_EVENT, 1000)
+            # Nothing follows the mouse, so moving it needn't wake the loop
+            pygame.event.set_blocked(pygame.MOUSEMOTION)
         
         running = True
         while running:
             # --- 1. Event Handling ---
-            for event in pygame.event.get():
+            # Every change is drawn in the same pass, so an idle game can sleep until the next event
+            for event in self.next_events(self.event_driven and self.idle()):
                 if event.type == pygame.QUIT:
+                    self.save_game()
+                    self.save_recording()
                     pygame.quit()
                     sys.exit()
+
+                # --- Performance overlay keys (also on the game over screen) ---
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_F3:
+                        perf_overlay.toggle()
+                        if not perf_overlay.enabled:
+                            self.erase_perf_overlay()
+                    elif event.key == pygame.K_F4:
+                        perf_overlay.save_csv()
+                    elif event.key == pygame.K_F5:
+                        perf_overlay.toggle_profiler()
                 
                 if event.type == pygame.KEYUP:
                     if event.key == pygame.K_r and self.game_over:
@@ -390,156 +1130,146 @@ class Game:
                 if self.game_over:
                     continue # Stop processing game input if game is over
 
+                # --- Zoom (mouse wheel or +/-) ---
+                if event.type == pygame.MOUSEWHEEL:
+                    mouse_x, mouse_y = pygame.mouse.get_pos()
+                    if self.camera.zoom(event.y, mouse_x, mouse_y):
+                        self.full_redraw = True
+                elif event.type == pygame.KEYDOWN and event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_MINUS):
+                    steps = -1 if event.key == pygame.K_MINUS else 1
+                    if self.camera.zoom(steps, self.view_width // 2, self.view_height // 2):
+                        self.full_redraw = True
+
                 # --- Mouse Clicks ---
-                if event.type == pygame.MOUSEBUTTONDOWN:
+                # Buttons 4 and 5 are the wheel, which zooms instead
+                if event.type == pygame.MOUSEBUTTONDOWN and event.button in (1, 2, 3):
                     mouse_x, mouse_y = pygame.mouse.get_pos()
                     
-                    # Check if click is within the grid
-                    if mouse_y >= self.rows * CELL_SIZE:
-                        continue # Click was in the UI area, ignore
-
-                    col = mouse_x // CELL_SIZE
-                    row = mouse_y // CELL_SIZE
+                    # Map the click through the camera (None in the UI area or off the board)
+                    cell = self.camera.cell_at(mouse_x, mouse_y)
                     
-                    # Check for valid cell (in case of weird clicks)
-                    if 0 <= row < self.rows and 0 <= col < self.cols:
-                        
-                        # --- Handle First Click ---
-                        if self.first_click:
-                            # 1. Create the board *now*
-                            self.board = self.create_board(row, col)
-                            # 2. Start the timer
-                            self.start_time = pygame.time.get_ticks()
-                            # 3. Mark first click as done
-                            self.first_click = False
-                        
-                        cell = self.board[row][col]
-
-                        # --- Left Click ---
-                        if event.button == 1:
-                            if not cell.is_flagged:
-                                if not self.reveal_cell(row, col):
-                                    # Hit a mine!
-                                    self.game_over = True
-                                    self.won = False
-                                    # Reveal all other mines
-                                    for r in range(self.rows):
-                                        for c in range(self.cols):
-                                            if self.board[r][c].is_mine:
-                                                self.board[r][c].is_revealed = True
-                        
-                        # --- Right Click ---
-                        elif event.button == 3:
-                            if not cell.is_revealed:
-                                if cell.is_flagged:
-                                    cell.is_flagged = False
-                                    self.flags_placed -= 1
-                                    play_sound(flag_sound)  # Play sound when unflagging
-                                else:
-                                    self.flags_placed += 1
-                                    cell.is_flagged = True
-                                    play_sound(flag_sound)  # Play sound when flagging
-                        
-                        # --- Middle Click (Chording) ---
-                        elif event.button == 2:
-                            if cell.is_revealed and cell.adjacent_mines > 0:
-                                # Count flagged neighbors
-                                flagged_neighbors = 0
-                                for dr in [-1, 0, 1]:
-                                    for dc in [-1, 0, 1]:
-                                        if dr == 0 and dc == 0:
-                                            continue
-                                        
-                                        nr, nc = row + dr, col + dc
-                                        
-                                        # Check boundaries
-                                        if 0 <= nr < self.rows and 0 <= nc < self.cols:
-                                            if self.board[nr][nc].is_flagged:
-                                                flagged_neighbors += 1
-                                
-                                # If we've flagged exactly the right number of neighbors
-                                if flagged_neighbors == cell.adjacent_mines:
-                                    # Reveal all unflagged, unrevealed neighbors
-                                    for dr in [-1, 0, 1]:
-                                        for dc in [-1, 0, 1]:
-                                            if dr == 0 and dc == 0:
-                                                continue
-                                            
-                                            nr, nc = row + dr, col + dc
-                                            
-                                            # Check boundaries
-                                            if 0 <= nr < self.rows and 0 <= nc < self.cols:
-                                                neighbor = self.board[nr][nc]
-                                                # Reveal if not flagged and not already revealed
-                                                if not neighbor.is_flagged and not neighbor.is_revealed:
-                                                    if not self.reveal_cell(nr, nc):
-                                                        # Hit a mine! Game over
-                                                        self.game_over = True
-                                                        self.won = False
-                                                        # Reveal all other mines
-                                                        for r in range(self.rows):
-                                                            for c in range(self.cols):
-                                                                if self.board[r][c].is_mine:
-                                                                    self.board[r][c].is_revealed = True
-
-            # --- 2. Update (Check Win) ---
+                    if cell is not None:
+                        self.handle_click(event.button, *cell)
+
+            if perf_overlay.enabled:
+                perf_overlay.mark() # events
+
+            # --- 2. Update (Sounds, Pan) ---
+            audio.flush() # Everything this frame's input asked for, at most once each
             if not self.game_over:
-                if self.check_win_condition():
-                    self.game_over = True
-                    self.won = True
-                    play_sound(win_sound)  # Play sound when winning
+                # Pan while an arrow key is held
+                keys = pygame.key.get_pressed()
+                dx = (keys[pygame.K_RIGHT] - keys[pygame.K_LEFT]) * PAN_SPEED
+                dy = (keys[pygame.K_DOWN] - keys[pygame.K_UP]) * PAN_SPEED
+                if (dx or dy) and self.camera.pan(dx, dy):
+                    self.full_redraw = True
+
+            if perf_overlay.enabled:
+                perf_overlay.mark() # update
 
             # --- 3. Draw ---
-            self.screen.fill(COLOR_REVEALED) # Background
-            self.draw_board()
-            
-            # Draw UI bar at the bottom
-            ui_bar_rect = pygame.Rect(0, self.rows * CELL_SIZE, self.screen_width, 50)
-            pygame.draw.rect(self.screen, COLOR_BLACK, ui_bar_rect)
-            
-            # Draw flag count
-            flag_text = ui_font.render(f"Flags: {self.flags_placed} / {self.mines}", True, COLOR_FLAG)
-            flag_rect = flag_text.get_rect(midleft=(20, ui_bar_rect.centery))
-            self.screen.blit(flag_text, flag_rect)
-            
-            # Draw timer
-            if self.start_time is not None:
-                elapsed_seconds = (pygame.time.get_ticks() - self.start_time) // 1000
-                timer_text = ui_font.render(f"Time: {elapsed_seconds}s", True, COLOR_WHITE)
-                timer_rect = timer_text.get_rect(center=(self.screen_width // 2, ui_bar_rect.centery))
-                self.screen.blit(timer_text, timer_rect)
-            
-            # If it's the first click, show instruction
-            if self.first_click:
-                instruction_text = main_font.render("Click anywhere to start!", True, COLOR_WHITE)
-                instruction_rect = instruction_text.get_rect(midright=(self.screen_width - 20, ui_bar_rect.centery))
-                self.screen.blit(instruction_text, instruction_rect)
-
-            if self.game_over:
-                if self.won:
-                    self.draw_ui("You Win!", (0, 255, 0)) # Green
-                else:
-                    self.draw_ui("You Hit a Mine!", COLOR_MINE)
-
-            # --- 4. Flip Display ---
-            pygame.display.flip()
+            if self.dirty_rendering:
+                if perf_overlay.enabled:
+                    # Back to the frame without the panel, so only real changes are drawn
+                    perf_overlay.erase(self.screen)
+                changed_rects = self.draw_changes()
+            else:
+                self.draw_frame()
+
+            if perf_overlay.enabled:
+                perf_overlay.mark() # draw
+                rect = perf_overlay.draw(self.screen, pygame.Rect(0, 0, self.view_width, self.view_height))
+                if self.dirty_rendering:
+                    changed_rects.append(rect)
+                perf_overlay.mark() # overlay
+
+            # --- 4. Update Display ---
+            if not self.dirty_rendering:
+                pygame.display.flip()
+            elif changed_rects:
+                # Only push the regions that changed this frame
+                pygame.display.update(changed_rects)
+
+            if perf_overlay.enabled:
+                perf_overlay.mark() # flip
 
             # --- 5. Cap Framerate ---
             clock.tick(FPS)
+            if perf_overlay.enabled:
+                perf_overlay.end_frame() # tick
+
+        pygame.time.set_timer(CLOCK_EVENT, 0)
+        self.save_recording()
             
     def run(self):
         """The main entry point that controls the game flow."""
-        while True:
-            # 1. Show start screen and get settings
+        if self.no_guess:
+            # Start filling the preset pools in the background right away
+            for pool in noguess.start_pools().values():
+                self.pools[(pool.rows, pool.cols, pool.mines)] = pool
+
+        # Endless mode, a saved game or a custom size from the command line skips the menu for the first game
+        saved = None if self.endless else self.load_game()
+        if self.endless:
+            self.setup_endless_window()
+        elif saved is not None:
+            board = saved[0]
+            self.setup_window(board.rows, board.cols, board.mines)
+        elif self.custom:
+            self.setup_window(self.custom['rows'], self.custom['cols'], self.custom['mines'])
+        else:
             self.start_screen()
-            # 2. Run the main game loop
-            self.main_game_loop()
-            # 3. When main_game_loop ends (due to 'R' press),
-            #    the loop repeats, showing the start screen again.
+
+        while True:
+            # 1. Run the main game loop
+            self.main_game_loop(saved)
+            saved = None
+            # 2. When main_game_loop ends (due to 'R' press),
+            #    show the start screen again to get settings
+            if self.endless:
+                self.setup_endless_window() # A new world, back at the middle
+            else:
+                self.start_screen()
+
+def parse_args(argv=None):
+    """Reads the optional custom board size, seed, game modes and recording file from the command line."""
+    parser = argparse.ArgumentParser(description=TITLE)
+    parser.add_argument("--rows", type=int, help="rows for a custom-size board")
+    parser.add_argument("--cols", type=int, help="columns for a custom-size board")
+    parser.add_argument("--mines", type=int, help="mines for a custom-size board")
+    parser.add_argument("--seed", type=int, help="seed for reproducible mine placement")
+    parser.add_argument("--no-guess", action="store_true",
+                        help="only deal boards that can be solved without guessing")
+    parser.add_argument("--endless", action="store_true",
+                        help="play on an infinite board (--seed picks the world)")
+    parser.add_argument("--record", metavar="FILE",
+                        help="append every game's seed and clicks to FILE for replay.py")
+    args = parser.parse_args(argv)
+
+    # Saves store the seed as a signed 64-bit number, with -1 for unknown
+    if args.seed is not None and not 0 <= args.seed <= savegame.MAX_SEED:
+        parser.error(f"--seed must be between 0 and {savegame.MAX_SEED}")
+
+    custom = None
+    sizes = (args.rows, args.cols, args.mines)
+    if any(value is not None for value in sizes):
+        if None in sizes:
+            parser.error("--rows, --cols and --mines must be given together")
+        try:
+            validate_board_size(*sizes)
+        except ValueError as error:
+            parser.error(str(error))
+        custom = {'rows': args.rows, 'cols': args.cols, 'mines': args.mines}
+    return custom, args.seed, args.no_guess, args.endless, args.record
 
 # --- Run the Game ---
 if __name__ == "__main__":
-    game = Game()
+    custom, seed, no_guess, endless, record_path = parse_args()
+    game = Game(custom)
+    game.seed = seed
+    game.no_guess = no_guess
+    game.endless = endless
+    game.record_path = record_path
     game.run()
 
 
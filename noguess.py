@@ -0,0 +1,181 @@
+"""
+No-guess boards.
+
+A board is "no-guess" for a first click if the solver in solver.py can
+clear it from that click using only certain moves. Finding one means
+generating boards until one passes, which is too slow to do when the
+player clicks, so BoardPool keeps validated boards ready per difficulty.
+
+A pooled board is stored as (seed, start row, start col) plus the cells
+of its opening. The first click is always a 0, and clicking any 0 cell
+of the same opening reveals exactly the same cells, so the board is
+still no-guess when the player clicks anywhere inside the opening. A
+background thread keeps generating boards until every cell of the board
+is covered by a few pooled openings, and saves the pool to disk so the
+next session starts full.
+"""
+
+import json
+import os
+import threading
+import time
+
+import engine
+import solver
+
+GENERATE_ATTEMPTS = 1000 # Boards tried before giving up on a no-guess board
+POOL_DEPTH = 2 # Pooled openings wanted over every cell
+CLICK_TIME_LIMIT = 0.2 # Seconds a first click may spend generating a board the pool doesn't have
+# Boards bigger than this aren't generated on a click at all: one math.comb
+# in the solver's probabilities can outlast the time limit there
+CLICK_MAX_CELLS = 100 * 1000
+POOL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'files', 'boards')
+
+
+def is_no_guess(rows, cols, mines, row, col, seed, deadline=None):
+    """
+    Returns True if the solver clears this board from (row, col) without
+    guessing. Returns False if it hasn't by deadline (a time.monotonic() value).
+    """
+    board = engine.create_board(rows, cols, mines, row, col, seed)
+    player = solver.Solver(board, seed, guessing=False, deadline=deadline)
+    player.apply(solver.Move('reveal', row, col, 0.0))
+    return player.play().won
+
+
+def generate(rows, cols, mines, row, col, seed=None, attempts=GENERATE_ATTEMPTS, time_limit=None):
+    """
+    Returns the seed of a board that is no-guess from (row, col), or None
+    if none was found in the given number of attempts or time_limit
+    seconds. The time limit also stops the attempt in progress. seed picks the sequence of boards tried, so a result is
+    reproducible.
+    """
+    rng, _ = engine.make_rng(seed)
+    deadline = None if time_limit is None else time.monotonic() + time_limit
+    for _ in range(attempts):
+        if deadline is not None and time.monotonic() > deadline:
+            return None
+        candidate = rng.getrandbits(32)
+        if is_no_guess(rows, cols, mines, row, col, candidate, deadline):
+            return candidate
+    return None
+
+
+def opening(rows, cols, mines, row, col, seed):
+    """Returns the flat indices of the 0 cells revealed by the first click."""
+    board = engine.create_board(rows, cols, mines, row, col, seed)
+    cells = board.reveal(row, col)
+    return cells[board.adjacent_mines.flat[cells] == 0]
+
+
+class BoardPool:
+    """Pre-validated no-guess boards for one board size, refilled in the background."""
+    def __init__(self, name, rows, cols, mines, path=None):
+        self.name = name
+        self.rows = rows
+        self.cols = cols
+        self.mines = mines
+        self.path = path or os.path.join(POOL_DIR, f"{name}.json")
+        self.entries = [] # [seed, start row, start col, opening cells]
+        self.coverage = [0] * (rows * cols) # Pooled openings over each cell
+        self.lock = threading.Lock()
+        self.wanted = threading.Event() # Set when the pool needs refilling
+        self.thread = None
+        self.load()
+
+    # --- Pool contents ---
+    def load(self):
+        """Reads the pool saved by an earlier session, if it matches this board size."""
+        try:
+            with open(self.path) as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return
+        if [data.get('rows'), data.get('cols'), data.get('mines')] != [self.rows, self.cols, self.mines]:
+            return
+        for entry in data.get('boards', []):
+            self.add(entry)
+
+    def save(self):
+        """Writes the pool to disk in one go."""
+        with self.lock:
+            data = {
+                'rows': self.rows, 'cols': self.cols, 'mines': self.mines,
+                'boards': [list(entry) for entry in self.entries],
+            }
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w') as file:
+                json.dump(data, file)
+            os.replace(temp_path, self.path)
+        except OSError as error:
+            print(f"Could not save board pool {self.path}: {error}")
+
+    def add(self, entry):
+        with self.lock:
+            self.entries.append(entry)
+            for cell in entry[3]:
+                self.coverage[cell] += 1
+
+    def take(self, row, col):
+        """
+        Removes and returns (seed, start row, start col) of a pooled board
+        whose opening contains (row, col), or None if there is none yet.
+        The board must be created with the start cell, then (row, col) revealed.
+        """
+        cell = row * self.cols + col
+        with self.lock:
+            for index, entry in enumerate(self.entries):
+                if cell in entry[3]:
+                    del self.entries[index]
+                    for covered in entry[3]:
+                        self.coverage[covered] -= 1
+                    break
+            else:
+                return None
+        self.wanted.set()
+        return entry[0], entry[1], entry[2]
+
+    def least_covered(self):
+        """Returns the cell with the fewest pooled openings, or None if the pool is full."""
+        with self.lock:
+            count = min(self.coverage)
+            if count >= POOL_DEPTH:
+                return None
+            return divmod(self.coverage.index(count), self.cols)
+
+    # --- Background refill ---
+    def start(self):
+        """Starts the background thread that keeps the pool full."""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.refill, name=f"pool-{self.name}", daemon=True)
+            self.thread.start()
+        self.wanted.set()
+
+    def refill(self):
+        while True:
+            self.wanted.wait()
+            cell = self.least_covered()
+            if cell is None:
+                self.wanted.clear()
+                continue
+            row, col = cell
+            seed = generate(self.rows, self.cols, self.mines, row, col)
+            if seed is None:
+                # This cell can't start a no-guess game (e.g. a crowded custom board)
+                with self.lock:
+                    self.coverage[row * self.cols + col] = POOL_DEPTH
+                continue
+            cells = opening(self.rows, self.cols, self.mines, row, col, seed).tolist()
+            self.add([seed, row, col, cells])
+            self.save()
+
+
+def start_pools(difficulties=engine.DIFFICULTIES):
+    """Creates and starts one pool per difficulty. Returns {name: BoardPool}."""
+    pools = {}
+    for name, settings in difficulties.items():
+        pools[name] = BoardPool(name, settings['rows'], settings['cols'], settings['mines'])
+        pools[name].start()
+    return pools
@@ -0,0 +1,101 @@
+"""
+Replays games recorded with `python minesweeper.py --record FILE`.
+
+Each recorded game is rebuilt from its seed and safe cell, then every
+click goes through Game.handle_click, the same click handling the main
+loop uses, as fast as possible: there is no event queue and no
+clock.tick. After the last click the board must match the recorded one,
+which makes a recording an exact repro of a bug report and a realistic
+workload for performance runs.
+
+    python replay.py games.jsonl [--game N] [--draw]
+
+--draw also renders every click with draw_changes, like the game does
+once per frame.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+# Must be set before pygame is imported by minesweeper
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+
+import engine
+import minesweeper
+
+
+def load(path):
+    """Returns the list of recorded games in a recording file."""
+    with open(path) as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def replay(game, record, draw=False):
+    """
+    Plays one recorded game on game (a minesweeper.Game) without delays.
+    Returns (matches, seconds): whether the final board matches the
+    recording, and how long the clicks took.
+    """
+    game.setup_window(record['rows'], record['cols'], record['mines'])
+    game.new_game()
+
+    # The board is built exactly as recorded, so pooled no-guess boards replay too
+    game.board = engine.create_board(record['rows'], record['cols'], record['mines'],
+                                     *record['safe_cell'], record['seed'])
+    game.start_time = pygame.time.get_ticks()
+    game.first_click = False
+
+    start = time.perf_counter()
+    for _, button, row, col in record['clicks']:
+        if game.game_over:
+            break
+        game.handle_click(button, row, col)
+        if draw:
+            rects = game.draw_changes()
+            if rects:
+                pygame.display.update(rects)
+    seconds = time.perf_counter() - start
+
+    matches = (
+        game.board.digest() == record['digest'] and
+        game.won == record['won'] and
+        bool(game.board.exploded) == record['exploded']
+    )
+    return matches, seconds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded Minesweeper games headlessly.")
+    parser.add_argument('path', help="recording made with minesweeper.py --record")
+    parser.add_argument('--game', type=int, help="replay only this game (0 is the first)")
+    parser.add_argument('--draw', action='store_true', help="render every click as the game would")
+    args = parser.parse_args(argv)
+
+    records = load(args.path)
+    if args.game is not None:
+        records = [(args.game, records[args.game])]
+    else:
+        records = list(enumerate(records))
+
+    game = minesweeper.Game()
+    failures = 0
+    for number, record in records:
+        matches, seconds = replay(game, record, args.draw)
+        clicks = len(record['clicks'])
+        rate = clicks / seconds if seconds > 0 else float('inf')
+        status = "ok" if matches else "MISMATCH"
+        if not matches:
+            failures += 1
+        print(f"game {number}: {record['rows']}x{record['cols']}/{record['mines']} seed {record['seed']}, "
+              f"{clicks} clicks in {seconds * 1000:.1f} ms ({rate:.0f} clicks/s) {status}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
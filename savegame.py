@@ -0,0 +1,104 @@
+"""
+Compact binary save files for a game in progress.
+
+A save is a fixed-size header followed by three bit planes, one bit per
+cell each: mines, revealed cells and flags. The adjacent mine counts are
+recomputed from the mines on load. A 1000x1000 board saves to about
+375 KB in a single write, and loading unpacks the planes with NumPy
+instead of looping over cells. Large saves are read through mmap so the
+file is never copied into a Python bytes object first.
+
+Header (little-endian): magic b'MSWP', version, rows, cols, mines, seed
+(-1 if unknown), safe cell row and col (-1 if unknown), elapsed time in
+milliseconds.
+"""
+
+import mmap
+import os
+import struct
+
+import numpy as np
+
+import engine
+
+MAGIC = b'MSWP'
+VERSION = 1
+HEADER = struct.Struct('<4sB3xIIIqiiQ')
+MMAP_THRESHOLD = 1 << 20 # Saves bigger than this (bytes) are loaded through mmap
+MAX_SEED = 2 ** 63 - 1 # Largest seed the header's signed 64-bit field holds
+MAX_SAFE_INDEX = 2 ** 31 - 1 # Largest safe cell row or col the header holds
+
+
+def save(path, board, elapsed_ms=0):
+    """
+    Writes a board with mines placed, plus the elapsed game time, to path.
+    Raises ValueError if the seed or safe cell doesn't fit in the header.
+    """
+    if board.seed is not None and not 0 <= board.seed <= MAX_SEED:
+        raise ValueError(f"Seed {board.seed} is outside 0..{MAX_SEED} and can't be saved")
+    if board.safe_cell is not None and not all(0 <= index <= MAX_SAFE_INDEX for index in board.safe_cell):
+        raise ValueError(f"Safe cell {board.safe_cell} can't be saved")
+    header = HEADER.pack(
+        MAGIC, VERSION, board.rows, board.cols, board.mines,
+        -1 if board.seed is None else board.seed,
+        *(board.safe_cell if board.safe_cell is not None else (-1, -1)),
+        int(elapsed_ms),
+    )
+    planes = np.concatenate([
+        np.packbits(board.is_mine, axis=None),
+        np.packbits(board.is_revealed, axis=None),
+        np.packbits(board.is_flagged, axis=None),
+    ])
+    with open(path, 'wb') as file:
+        file.write(header + planes.tobytes())
+
+
+def load(path):
+    """
+    Reads a save written by save(). Returns (board, elapsed_ms).
+    Raises ValueError if the file is not a valid save.
+    """
+    with open(path, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        if size < HEADER.size:
+            raise ValueError(f"{path} is too short to be a save file")
+        if size > MMAP_THRESHOLD:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return _decode(data, path)
+        return _decode(file.read(), path)
+
+
+def _decode(data, path):
+    magic, version, rows, cols, mines, seed, safe_row, safe_col, elapsed_ms = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} save file")
+
+    cells = rows * cols
+    plane_size = (cells + 7) // 8
+    if len(data) != HEADER.size + 3 * plane_size:
+        raise ValueError(f"{path} is truncated or has the wrong size")
+
+    board = engine.Board(rows, cols, mines)
+    planes = np.frombuffer(data, dtype=np.uint8, count=3 * plane_size, offset=HEADER.size)
+    # unpackbits copies, so nothing keeps a reference into the mmap after this
+    is_mine, is_revealed, is_flagged = (
+        np.unpackbits(plane, count=cells).reshape(rows, cols).astype(bool)
+        for plane in planes.reshape(3, plane_size)
+    )
+    del planes
+    if int(is_mine.sum()) != mines:
+        raise ValueError(f"{path} has {int(is_mine.sum())} mines, expected {mines}")
+
+    board.is_mine = is_mine
+    board.is_revealed = is_revealed
+    board.is_flagged = is_flagged
+    board.adjacent_mines = engine.count_adjacent_mines(is_mine)
+    board.mine_cells = np.flatnonzero(is_mine)
+    board.seed = None if seed < 0 else seed
+    board.safe_cell = None if safe_row < 0 else (safe_row, safe_col)
+
+    # Rebuild the counters reveal and toggle_flag keep up to date
+    board.flags_placed = int(is_flagged.sum())
+    board.exploded = bool((is_revealed & is_mine).any())
+    board.safe_cells_left = cells - mines - int((is_revealed & ~is_mine).sum())
+    return board, elapsed_ms
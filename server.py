@@ -0,0 +1,259 @@
+"""
+Headless Minesweeper server for bots and web front ends.
+
+One asyncio event loop serves every connection. Each connection can
+play any number of games, and the games run on the board engine in
+engine.py, so the reveal, flag, chord and win rules are exactly the
+game's, without pygame. Games end with their connection.
+
+The protocol is line-delimited JSON over TCP or a Unix socket: one
+request object per line, one response object per line, in order.
+Every request may carry an "id", which is echoed back.
+
+    {"op": "new", "difficulty": "hard", "seed": 7}
+    {"op": "new", "rows": 100, "cols": 100, "mines": 1500}
+        -> {"ok": true, "game": 1, "rows": 16, "cols": 30, "mines": 99}
+    {"op": "reveal", "game": 1, "row": 3, "col": 4}
+    {"op": "flag", "game": 1, "row": 3, "col": 4}
+    {"op": "chord", "game": 1, "row": 3, "col": 4}
+        -> {"ok": true, "cells": [[row, col, value], ...], "state": "playing", "flags": 0}
+    {"op": "close", "game": 1}
+        -> {"ok": true}
+
+Move responses are deltas: only the cells that changed, with value a
+number 0-8, "mine", "flag" or "hidden". state is "playing", "won" or
+"lost"; losing reveals every mine in the same delta. Errors come back as
+{"ok": false, "error": "..."}. Like the game, mines are placed on the
+first reveal, so the first click is always safe.
+
+    python server.py [--host 127.0.0.1] [--port 8765] [--unix PATH]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+
+import numpy as np
+
+import engine
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+MAX_LINE = 64 * 1024 # Longest request line accepted
+# Delta values of cells that don't show a number
+MINE, FLAG, HIDDEN = -1, -2, -3
+VALUE_NAMES = {MINE: 'mine', FLAG: 'flag', HIDDEN: 'hidden'}
+
+
+class ProtocolError(Exception):
+    """A request the server can't carry out; its message goes back to the client."""
+
+
+def is_int(value):
+    """True for JSON integers. true and false decode to bool, which is an int subclass."""
+    return type(value) is int
+
+
+class Session:
+    """One game on a connection. The board is created on the first reveal."""
+    def __init__(self, rows, cols, mines, seed=None):
+        engine.validate_config(rows, cols, mines)
+        self.rows = rows
+        self.cols = cols
+        self.mines = mines
+        self.seed = seed
+        self.board = None
+        self.state = 'playing'
+
+    def move(self, op, row, col):
+        """Applies reveal, flag or chord. Returns the flat indices of the changed cells."""
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            raise ProtocolError(f"({row}, {col}) is off the {self.rows}x{self.cols} board")
+        if self.state != 'playing':
+            raise ProtocolError(f"Game is over ({self.state})")
+
+        if self.board is None:
+            if op != 'reveal':
+                raise ProtocolError("The first move must be a reveal")
+            self.board = engine.create_board(self.rows, self.cols, self.mines, row, col, self.seed)
+
+        board = self.board
+        if op == 'reveal':
+            cells = board.reveal(row, col)
+        elif op == 'flag':
+            cells = [row * self.cols + col] if board.toggle_flag(row, col) else []
+        else:
+            cells = board.chord(row, col)
+
+        # Same end-of-move checks as Game.handle_click
+        if board.exploded:
+            self.state = 'lost'
+            board.reveal_mines()
+            cells = np.union1d(cells, board.mine_cells)
+        elif board.check_win():
+            self.state = 'won'
+        return cells
+
+    def delta(self, cells):
+        """Returns the response fields for the changed cells (flat indices)."""
+        cells = np.asarray(cells, dtype=np.intp)
+        board = self.board
+
+        # Work out every cell's value at once, then name the ones without a number
+        revealed_values = np.where(board.is_mine.flat[cells], MINE, board.adjacent_mines.flat[cells].astype(np.int8))
+        hidden_values = np.where(board.is_flagged.flat[cells], FLAG, HIDDEN)
+        values = np.where(board.is_revealed.flat[cells], revealed_values, hidden_values)
+        rows, cols = np.divmod(cells, self.cols)
+        return {
+            'cells': [
+                [row, col, value if value >= 0 else VALUE_NAMES[value]]
+                for row, col, value in zip(rows.tolist(), cols.tolist(), values.tolist())
+            ],
+            'state': self.state,
+            'flags': board.flags_placed,
+        }
+
+
+class Connection:
+    """The games of one client connection and the handling of its requests."""
+    def __init__(self, server):
+        self.server = server
+        self.games = {}
+
+    def handle(self, request):
+        """Returns the response object for one decoded request."""
+        if not isinstance(request, dict):
+            raise ProtocolError("A request must be a JSON object")
+        op = request.get('op')
+        if op == 'new':
+            return self.new_game(request)
+        if op in ('reveal', 'flag', 'chord'):
+            session = self.game(request)
+            row, col = request.get('row'), request.get('col')
+            if not is_int(row) or not is_int(col):
+                raise ProtocolError("row and col must be integers")
+            return {'ok': True, **session.delta(session.move(op, row, col))}
+        if op == 'close':
+            self.game(request) # Unknown games are an error
+            del self.games[request['game']]
+            return {'ok': True}
+        raise ProtocolError(f"Unknown op {op!r}")
+
+    def new_game(self, request):
+        difficulty = request.get('difficulty')
+        if difficulty is not None:
+            if not isinstance(difficulty, str):
+                raise ProtocolError("difficulty must be a string")
+            settings = engine.DIFFICULTIES.get(difficulty)
+            if settings is None:
+                raise ProtocolError(f"Unknown difficulty {difficulty!r}")
+            rows, cols, mines = settings['rows'], settings['cols'], settings['mines']
+        else:
+            rows, cols, mines = request.get('rows'), request.get('cols'), request.get('mines')
+            if not all(is_int(value) for value in (rows, cols, mines)):
+                raise ProtocolError("new needs a difficulty or integer rows, cols and mines")
+        if rows * cols > self.server.max_cells:
+            raise ProtocolError(f"Boards are limited to {self.server.max_cells} cells")
+        seed = request.get('seed')
+        if seed is not None and not is_int(seed):
+            raise ProtocolError("seed must be an integer")
+
+        try:
+            session = Session(rows, cols, mines, seed)
+        except ValueError as error:
+            raise ProtocolError(str(error))
+        self.server.next_game += 1
+        game_id = self.server.next_game
+        self.games[game_id] = session
+        return {'ok': True, 'game': game_id, 'rows': rows, 'cols': cols, 'mines': mines}
+
+    def game(self, request):
+        game_id = request.get('game')
+        if not is_int(game_id):
+            raise ProtocolError("game must be an integer")
+        session = self.games.get(game_id)
+        if session is None:
+            raise ProtocolError(f"No game {game_id} on this connection")
+        return session
+
+
+class Server:
+    """Accepts connections and serves their requests on one event loop."""
+    def __init__(self, max_cells=1000 * 1000):
+        self.max_cells = max_cells # Largest board a client may ask for
+        self.next_game = 0
+        self.connections = 0
+
+    async def serve_client(self, reader, writer):
+        connection = Connection(self)
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError: # Line longer than MAX_LINE
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                writer.write(self.respond(connection, line))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    def respond(self, connection, line):
+        """Returns the encoded response line for one request line."""
+        request_id = None
+        try:
+            try:
+                request = json.loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError) as error:
+                raise ProtocolError(f"Invalid JSON: {error}")
+            if isinstance(request, dict):
+                request_id = request.get('id')
+            response = connection.handle(request)
+        except ProtocolError as error:
+            response = {'ok': False, 'error': str(error)}
+        except Exception as error:
+            # A request the checks above missed must not drop the connection and its games
+            response = {'ok': False, 'error': f"Internal error: {type(error).__name__}: {error}"}
+        if request_id is not None:
+            response['id'] = request_id
+        return (json.dumps(response, separators=(',', ':')) + "\n").encode()
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None):
+        """Starts listening. Returns the asyncio server."""
+        if unix_path is not None:
+            if os.path.exists(unix_path):
+                os.unlink(unix_path) # A socket file left by an earlier run
+            return await asyncio.start_unix_server(self.serve_client, unix_path, limit=MAX_LINE, backlog=4096)
+        return await asyncio.start_server(self.serve_client, host, port, limit=MAX_LINE, backlog=4096)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve Minesweeper games over line-delimited JSON.")
+    parser.add_argument('--host', default=DEFAULT_HOST, help="TCP address to listen on")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="TCP port to listen on")
+    parser.add_argument('--unix', metavar='PATH', help="listen on a Unix socket instead of TCP")
+    return parser.parse_args(argv)
+
+
+async def main(argv=None):
+    args = parse_args(argv)
+    server = await Server().start(args.host, args.port, args.unix)
+    where = args.unix or f"{args.host}:{args.port}"
+    print(f"Serving Minesweeper on {where}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
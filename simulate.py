@@ -0,0 +1,142 @@
+"""
+Monte Carlo win-rate statistics.
+
+Plays many games per difficulty with the solver from solver.py, spread
+over a process pool, and prints win rate, mean clicks, guesses per game
+and games per second. Boards come from engine.create_board, so the first
+click is safe exactly as in the real game.
+
+Game i of a run uses seed (--seed + i), so results don't depend on how
+many workers there are. Every finished game is appended to the results
+file as one JSON line; running the same command again skips the seeds
+already in the file, so a long run can be stopped and resumed.
+
+    python simulate.py easy medium hard --games 10000
+    python simulate.py --rows 30 --cols 30 --mines 150 --games 2000
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import engine
+import solver
+
+CHUNK_SIZE = 50 # Games per task sent to a worker
+
+
+def play_chunk(name, rows, cols, mines, games):
+    """Plays the given (index, seed) games in a worker. Returns one record per game."""
+    records = []
+    for index, seed in games:
+        start = time.perf_counter()
+        _, _, result = solver.play_game(rows, cols, mines, seed)
+        records.append({
+            'config': name, 'game': index, 'seed': seed,
+            'won': result.won, 'clicks': result.clicks, 'guesses': result.guesses,
+            'seconds': time.perf_counter() - start,
+        })
+    return records
+
+
+def load_results(path):
+    """Reads the records already written to the results file, if any."""
+    records = []
+    if os.path.exists(path):
+        with open(path) as file:
+            for line in file:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    pass # A run stopped halfway through writing this line
+    return records
+
+
+def summarize(name, records, elapsed, played):
+    """Prints one line of statistics for a configuration."""
+    games = len(records)
+    if games == 0:
+        print(f"{name:>16}: no games")
+        return
+    wins = sum(record['won'] for record in records)
+    clicks = sum(record['clicks'] for record in records) / games
+    guesses = sum(record['guesses'] for record in records) / games
+    rate = played / elapsed if elapsed > 0 and played else 0.0
+    print(f"{name:>16}: {games} games, win rate {wins / games:6.2%}, "
+          f"{clicks:.1f} clicks, {guesses:.2f} guesses/game, {rate:.0f} games/s")
+
+
+def run(configs, games, seed, workers, output):
+    """Plays games for every (name, rows, cols, mines) config and prints the statistics."""
+    records = load_results(output)
+    done = {(record['config'], record['seed']) for record in records}
+
+    with open(output, 'a') as file, ProcessPoolExecutor(max_workers=workers) as pool:
+        for name, rows, cols, mines in configs:
+            todo = [(index, seed + index) for index in range(games) if (name, seed + index) not in done]
+            if len(todo) < games:
+                print(f"{name}: resuming, {games - len(todo)} games already in {output}")
+
+            start = time.perf_counter()
+            futures = [
+                pool.submit(play_chunk, name, rows, cols, mines, todo[i:i + CHUNK_SIZE])
+                for i in range(0, len(todo), CHUNK_SIZE)
+            ]
+            for future in as_completed(futures):
+                chunk = future.result()
+                # Write each chunk as soon as it finishes so an interrupted run keeps it
+                file.write(''.join(json.dumps(record) + '\n' for record in chunk))
+                file.flush()
+                records += chunk
+            elapsed = time.perf_counter() - start
+
+            summarize(name, [
+                record for record in records
+                if record['config'] == name and seed <= record['seed'] < seed + games
+            ], elapsed, len(todo))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Estimate solver win rates by playing many games.")
+    parser.add_argument('difficulties', nargs='*', metavar='difficulty',
+                        help=f"Presets to play: {', '.join(engine.DIFFICULTIES)} "
+                             "(default: all, unless a custom size is given)")
+    parser.add_argument('--rows', type=int, help="Rows of a custom board")
+    parser.add_argument('--cols', type=int, help="Columns of a custom board")
+    parser.add_argument('--mines', type=int, help="Mines on a custom board")
+    parser.add_argument('--games', type=int, default=1000, help="Games per configuration")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the first game")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--output', default='simulation.jsonl', help="Results file, appended to and resumed from")
+    args = parser.parse_args(argv)
+    for name in args.difficulties:
+        if name not in engine.DIFFICULTIES:
+            parser.error(f"unknown difficulty {name!r}")
+
+    configs = [
+        (name, settings['rows'], settings['cols'], settings['mines'])
+        for name, settings in engine.DIFFICULTIES.items()
+        if name in args.difficulties
+    ]
+    custom = (args.rows, args.cols, args.mines)
+    if any(value is not None for value in custom):
+        if None in custom:
+            parser.error("--rows, --cols and --mines must be given together")
+        try:
+            engine.validate_config(*custom)
+        except ValueError as error:
+            parser.error(str(error))
+        configs.append((f"{args.rows}x{args.cols}/{args.mines}", *custom))
+    elif not configs:
+        configs = [
+            (name, settings['rows'], settings['cols'], settings['mines'])
+            for name, settings in engine.DIFFICULTIES.items()
+        ]
+    return args, configs
+
+
+if __name__ == "__main__":
+    args, configs = parse_args()
+    run(configs, args.games, args.seed, args.workers, args.output)
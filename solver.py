@@ -0,0 +1,456 @@
+"""
+Automated player for the headless board engine.
+
+The solver only looks at what a player can see: the numbers on revealed
+cells (adjacent_mines) and the revealed and flagged state. Each turn it
+tries, in order:
+
+1. Single-cell rules, vectorized over the whole board: a number with as
+   many flags as mines is chorded, and a number whose hidden neighbors
+   must all be mines gets them flagged.
+2. Subset rules between pairs of numbers that share hidden neighbors.
+3. Mine probabilities. The frontier (hidden cells next to a number) is
+   split into independent components, each solved exactly or, if it is
+   too large, by sampling. The components are then combined with the
+   hidden cells away from the frontier. Cells with probability 0 or 1
+   are certain moves; otherwise the safest cell is a guess.
+
+Moves go through the same Board.reveal, Board.toggle_flag and Board.chord
+paths the game uses. Run it with:
+
+    python solver.py [easy|medium|hard] [seed]
+"""
+
+import math
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+import engine
+
+# action is 'reveal', 'flag' or 'chord'; probability is the chance the
+# move hits a mine (for 'flag', the chance the cell really is a mine).
+# guess is True when no certain move was left.
+Move = namedtuple("Move", "action row col probability guess", defaults=(False,))
+Result = namedtuple("Result", "won clicks guesses")
+
+EXACT_NODE_LIMIT = 50000 # Search steps per component before falling back to sampling
+SAMPLE_COUNT = 100 # Solutions sampled for a component that is too large to solve exactly
+
+
+class OutOfTime(Exception):
+    """Raised inside a turn once the solver's deadline has passed."""
+
+
+class Solver:
+    """Plays a board that already has its mines placed."""
+    def __init__(self, board, seed=None, guessing=True, deadline=None):
+        self.board = board
+        self.rng, _ = engine.make_rng(seed)
+        self.guessing = guessing # False stops the game at the first guess instead
+        self.deadline = deadline # time.monotonic() value after which play() gives up
+        self.moves = [] # Every move applied, in order
+        self.guesses = 0
+
+    # --- Rules ---
+    def certain_moves(self):
+        """Single-cell rules for every number on the board at once."""
+        board = self.board
+        hidden = ~board.is_revealed & ~board.is_flagged
+        hidden_around = engine.count_neighbours(hidden)
+        mines_left = board.adjacent_mines.astype(np.int16) - engine.count_neighbours(board.is_flagged)
+        frontier = board.is_revealed & (hidden_around > 0)
+
+        # All mines around it are flagged: chording reveals the rest
+        moves = [
+            Move('chord', row, col, 0.0)
+            for row, col in np.argwhere(frontier & (mines_left == 0)).tolist()
+        ]
+
+        # Every hidden cell around it must be a mine
+        full = frontier & (mines_left == hidden_around)
+        to_flag = hidden & (engine.count_neighbours(full) > 0)
+        moves += [Move('flag', row, col, 1.0) for row, col in np.argwhere(to_flag).tolist()]
+        return moves
+
+    def constraints(self):
+        """
+        Returns one (hidden neighbors, mines left) pair per frontier number,
+        with the hidden neighbors as a frozenset of flat cell indices.
+        """
+        board = self.board
+        hidden = ~board.is_revealed & ~board.is_flagged
+        hidden_around = engine.count_neighbours(hidden)
+        mines_left = board.adjacent_mines.astype(np.int16) - engine.count_neighbours(board.is_flagged)
+        numbers = np.flatnonzero(board.is_revealed & (hidden_around > 0))
+
+        # Look up every frontier number's neighbors at once; -1 (off the board) is masked out
+        neighbours = engine.neighbour_table(board.rows, board.cols)[numbers]
+        is_hidden = hidden.ravel()[neighbours] & (neighbours >= 0)
+        return [
+            (frozenset(cells[mask].tolist()), left)
+            for cells, mask, left in zip(neighbours, is_hidden, mines_left.ravel()[numbers].tolist())
+        ]
+
+    def subset_moves(self, constraints):
+        """If one number's hidden neighbors contain another's, the difference is decided."""
+        by_cell = {}
+        for constraint in constraints:
+            for cell in constraint[0]:
+                by_cell.setdefault(cell, []).append(constraint)
+
+        safe, mines = set(), set()
+        for small_cells, small_left in constraints:
+            others = {other for cell in small_cells for other in by_cell[cell]}
+            for big_cells, big_left in others:
+                if not small_cells < big_cells:
+                    continue
+                extra = big_cells - small_cells
+                extra_mines = big_left - small_left
+                if extra_mines == 0:
+                    safe |= extra
+                elif extra_mines == len(extra):
+                    mines |= extra
+
+        return (
+            [self._move('reveal', cell, 0.0) for cell in sorted(safe)] +
+            [self._move('flag', cell, 1.0) for cell in sorted(mines - safe)]
+        )
+
+    # --- Probabilities ---
+    def probabilities(self, constraints):
+        """
+        Returns ({cell: mine probability} for the frontier, probability for
+        any other hidden cell, list of the other hidden cells, exact). exact
+        is False if a component had to be sampled, in which case a 0 or 1 is
+        only an estimate.
+        """
+        board = self.board
+        hidden = ~board.is_revealed & ~board.is_flagged
+        frontier_cells = set().union(*(cells for cells, _ in constraints)) if constraints else set()
+        interior = [cell for cell in np.flatnonzero(hidden).tolist() if cell not in frontier_cells]
+        mines_left = board.mines - board.flags_placed
+
+        # Solve each independent part of the frontier on its own
+        components = [self._solve_component(part) for part in self._split(constraints)]
+
+        # Weight of a total of t frontier mines, times the ways to place the rest inside
+        def interior_ways(frontier_mines):
+            self._check_deadline() # math.comb on a big interior is the slow part of a turn
+            rest = mines_left - frontier_mines
+            return math.comb(len(interior), rest) if 0 <= rest <= len(interior) else 0
+
+        total = [1]
+        exact = all(component_exact for _, _, component_exact in components)
+        for counts, _, _ in components:
+            total = _convolve(total, counts)
+        weight = sum(ways * interior_ways(t) for t, ways in enumerate(total))
+        if weight == 0:
+            # Inconsistent view (e.g. a wrong flag): fall back to the plain density
+            density = mines_left / max(int(hidden.sum()), 1)
+            return {cell: density for cell in frontier_cells}, density, interior, False
+
+        probabilities = {}
+        for index, (counts, cell_counts, _) in enumerate(components):
+            # Mine count distribution of all the other components
+            others = [1]
+            for other_index, (other_counts, _, _) in enumerate(components):
+                if other_index != index:
+                    others = _convolve(others, other_counts)
+
+            outside = [
+                sum(ways * interior_ways(k + j) for j, ways in enumerate(others))
+                for k in range(len(counts))
+            ]
+            for cell, per_count in cell_counts.items():
+                mine_weight = sum(per_count[k] * outside[k] for k in range(len(counts)))
+                probabilities[cell] = mine_weight / weight
+
+        interior_probability = 0.0
+        if interior:
+            expected = sum(
+                ways * interior_ways(t) * (mines_left - t) for t, ways in enumerate(total)
+            )
+            interior_probability = expected / weight / len(interior)
+        return probabilities, interior_probability, interior, exact
+
+    def _split(self, constraints):
+        """Groups constraints into components that share no hidden cells."""
+        parent = list(range(len(constraints)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        owner = {}
+        for index, (cells, _) in enumerate(constraints):
+            for cell in cells:
+                if cell in owner:
+                    parent[find(index)] = find(owner[cell])
+                else:
+                    owner[cell] = index
+
+        groups = {}
+        for index, constraint in enumerate(constraints):
+            groups.setdefault(find(index), []).append(constraint)
+        return list(groups.values())
+
+    def _solve_component(self, constraints):
+        """
+        Counts the mine layouts of one frontier component.
+        Returns (counts, cell_counts, exact): counts[k] is the number of
+        layouts with k mines and cell_counts[cell][k] how many of those have
+        a mine on cell. exact is False if the search was too large and the
+        layouts were sampled instead.
+        """
+        cells = self._search_order(constraints)
+        solutions = self._search(cells, constraints, EXACT_NODE_LIMIT, shuffle=False)
+        exact = solutions is not None
+        if not exact:
+            solutions = []
+            for _ in range(SAMPLE_COUNT):
+                sample = self._search(cells, constraints, EXACT_NODE_LIMIT // SAMPLE_COUNT, shuffle=True, first_only=True)
+                if sample:
+                    solutions += sample
+
+        size = len(cells) + 1
+        counts = [0] * size
+        cell_counts = {cell: [0] * size for cell in cells}
+        for layout in solutions:
+            k = len(layout)
+            counts[k] += 1
+            for cell in layout:
+                cell_counts[cell][k] += 1
+
+        if not solutions:
+            # Not even a sample was found: treat every count as equally likely
+            counts = [1] * size
+            cell_counts = {cell: [k / len(cells) for k in range(size)] for cell in cells}
+        return counts, cell_counts, exact
+
+    def _search_order(self, constraints):
+        """Orders cells so neighboring ones are assigned together and constraints close early."""
+        neighbours = {}
+        for cells, _ in constraints:
+            for cell in cells:
+                neighbours.setdefault(cell, set()).update(cells)
+
+        order, seen = [], set()
+        for start in sorted(neighbours):
+            if start in seen:
+                continue
+            queue = [start]
+            seen.add(start)
+            for cell in queue:
+                order.append(cell)
+                for other in sorted(neighbours[cell] - seen):
+                    seen.add(other)
+                    queue.append(other)
+        return order
+
+    def _search(self, cells, constraints, node_limit, shuffle, first_only=False):
+        """
+        Depth-first search over mine/safe assignments with an explicit
+        stack. Returns a list of layouts (tuples of mine cells), or None if
+        node_limit steps were not enough to finish.
+        """
+        position = {cell: i for i, cell in enumerate(cells)}
+        # For each cell, the constraints it takes part in
+        cell_constraints = [[] for _ in cells]
+        needed = []
+        remaining = []
+        for index, (group, mines_left) in enumerate(constraints):
+            needed.append(mines_left)
+            remaining.append(len(group))
+            for cell in group:
+                cell_constraints[position[cell]].append(index)
+
+        def fits(depth, is_mine):
+            # Assign the cell and check every constraint it touches still works
+            ok = True
+            for index in cell_constraints[depth]:
+                remaining[index] -= 1
+                if is_mine:
+                    needed[index] -= 1
+                if needed[index] < 0 or needed[index] > remaining[index]:
+                    ok = False
+            return ok
+
+        def undo(depth, is_mine):
+            for index in cell_constraints[depth]:
+                remaining[index] += 1
+                if is_mine:
+                    needed[index] += 1
+
+        solutions = []
+        layout = []
+        nodes = 0
+        # Each stack entry is (depth, values still to try at that depth)
+        first_values = [True, False]
+        if shuffle:
+            self.rng.shuffle(first_values)
+        stack = [(0, list(first_values))]
+        assigned = [] # Value currently assigned at each depth
+
+        while stack:
+            nodes += 1
+            if nodes > node_limit:
+                return None
+            if nodes % 1024 == 0:
+                self._check_deadline()
+
+            depth, values = stack[-1]
+            if len(assigned) > depth:
+                # Backtrack out of the previous value at this depth
+                value = assigned.pop()
+                undo(depth, value)
+                if value:
+                    layout.pop()
+            if not values:
+                stack.pop()
+                continue
+
+            value = values.pop(0)
+            assigned.append(value)
+            if value:
+                layout.append(cells[depth])
+            if not fits(depth, value):
+                continue
+
+            if depth + 1 == len(cells):
+                solutions.append(tuple(layout))
+                if first_only:
+                    return solutions
+                continue
+
+            next_values = [True, False]
+            if shuffle:
+                self.rng.shuffle(next_values)
+            stack.append((depth + 1, next_values))
+        return solutions
+
+    # --- Playing ---
+    def next_moves(self):
+        """Returns the moves for this turn: certain moves if any, otherwise one guess."""
+        moves = self.certain_moves()
+        if moves:
+            return moves
+
+        constraints = self.constraints()
+        moves = self.subset_moves(constraints)
+        if moves:
+            return moves
+
+        probabilities, interior_probability, interior, exact = self.probabilities(constraints)
+        certain = [
+            self._move('reveal' if p == 0 else 'flag', cell, p)
+            for cell, p in sorted(probabilities.items()) if exact and p in (0, 1)
+        ]
+        if interior and exact and interior_probability in (0, 1):
+            action = 'reveal' if interior_probability == 0 else 'flag'
+            certain += [self._move(action, cell, interior_probability) for cell in interior]
+        if certain:
+            return certain
+
+        # --- Guess the safest cell ---
+        best_cell, best = None, 2.0
+        for cell, p in sorted(probabilities.items()):
+            if p < best:
+                best_cell, best = cell, p
+        if interior and (best_cell is None or interior_probability < best):
+            best_cell, best = self.rng.choice(interior), interior_probability
+        row, col = divmod(best_cell, self.board.cols)
+        return [Move('reveal', row, col, best, True)]
+
+    def apply(self, move):
+        """Plays one move through the board engine. Returns the flat indices revealed."""
+        board = self.board
+        if move.action == 'flag':
+            if not board.is_flagged[move.row, move.col]:
+                board.toggle_flag(move.row, move.col)
+            revealed = np.empty(0, dtype=np.intp)
+        elif move.action == 'chord':
+            revealed = board.chord(move.row, move.col)
+        else:
+            revealed = board.reveal(move.row, move.col)
+            if move.guess:
+                self.guesses += 1
+        self.moves.append(move)
+        return revealed
+
+    def step(self):
+        """Plays one turn. Returns the moves that were applied."""
+        applied = []
+        for move in self.next_moves():
+            if self.board.exploded or (move.guess and not self.guessing):
+                break
+            # Earlier moves this turn may already have revealed or flagged the cell
+            if move.action != 'chord' and (
+                    self.board.is_revealed[move.row, move.col] or self.board.is_flagged[move.row, move.col]):
+                continue
+            self.apply(move)
+            applied.append(move)
+        return applied
+
+    def play(self):
+        """Plays until the game is won or lost, or stops unfinished at the deadline."""
+        try:
+            while not self.board.exploded and not self.board.check_win():
+                self._check_deadline()
+                if not self.step():
+                    break # Stopped at a guess, or nothing left to do
+        except OutOfTime:
+            pass
+        return Result(self.board.check_win(), len(self.moves), self.guesses)
+
+    def _check_deadline(self):
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise OutOfTime
+
+    def _move(self, action, cell, probability):
+        row, col = divmod(cell, self.board.cols)
+        return Move(action, row, col, probability)
+
+
+def _convolve(a, b):
+    """Multiplies two mine count distributions (lists of integer weights)."""
+    result = [0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        if x:
+            for j, y in enumerate(b):
+                result[i + j] += x * y
+    return result
+
+
+def play_game(rows, cols, mines, seed=None, first_click=None):
+    """
+    Plays one game from a first click (the center by default) using the
+    game's safe-first-click board generation. Returns (board, solver, result).
+    """
+    row, col = first_click if first_click is not None else (rows // 2, cols // 2)
+    board = engine.create_board(rows, cols, mines, row, col, seed)
+    solver = Solver(board, board.seed)
+    solver.apply(Move('reveal', row, col, 0.0))
+    return board, solver, solver.play()
+
+
+if __name__ == "__main__":
+    import time
+
+    name = sys.argv[1] if len(sys.argv) > 1 else 'hard'
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    settings = engine.DIFFICULTIES[name]
+    start = time.perf_counter()
+    board, solver, result = play_game(settings['rows'], settings['cols'], settings['mines'], seed)
+    elapsed = time.perf_counter() - start
+
+    for move in solver.moves:
+        if move.guess:
+            print(f"guess {move.action} ({move.row}, {move.col}) mine probability {move.probability:.3f}")
+    outcome = "won" if result.won else "lost"
+    print(f"{name} (seed {board.seed}): {outcome} in {result.clicks} moves, "
+          f"{result.guesses} guesses, {elapsed * 1000:.1f} ms")